@@ -0,0 +1,62 @@
+"""Recall@k and queries/second of src.ann.IVFIndex against exact search.
+
+Uses a clustered synthetic corpus of normalized vectors and sweeps n_probe.
+
+    python benchmarks/bench_ann.py --sections 200000 --probes 1 4 8 16 32
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ann import IVFIndex
+from src.ranking import top_k_indices
+
+
+def clustered_corpus(n, dim, n_topics, seed=0):
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    vectors = topics[rng.integers(0, n_topics, size=n)] + 2 * rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = topics[rng.integers(0, n_topics, size=200)] + 2 * rng.standard_normal((200, dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors, queries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sections", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    vectors, queries = clustered_corpus(args.sections, args.dim, args.topics)
+    queries = queries[:args.queries]
+
+    start = time.perf_counter()
+    exact = [top_k_indices(vectors @ q, args.k) for q in queries]
+    exact_qps = len(queries) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    index = IVFIndex().build(vectors)
+    print(f"sections: {args.sections}  lists: {index.n_lists}  build: {time.perf_counter() - start:.1f}s")
+    print(f"{'n_probe':>8} {'recall@' + str(args.k):>10} {'QPS':>10} {'vs exact':>9}")
+    print(f"{'exact':>8} {1.0:>10.3f} {exact_qps:>10.0f} {1.0:>8.1f}x")
+
+    for n_probe in args.probes:
+        start = time.perf_counter()
+        results = [index.search(q, args.k, n_probe=n_probe)[0] for q in queries]
+        qps = len(queries) / (time.perf_counter() - start)
+        recall = np.mean([len(set(r) & set(e)) / args.k for r, e in zip(results, exact)])
+        print(f"{n_probe:>8} {recall:>10.3f} {qps:>10.0f} {qps / exact_qps:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""End-to-end and per-stage benchmark on synthetic PDF corpora.
+
+Generates PDFs with PyMuPDF (size, heading density and table density are
+flags), then times each stage on its own and the whole pipeline:
+
+  extract    document_sections (outline + section records) per PDF
+  embed      embed_records per PDF
+  rank       rank_sections per query over the whole corpus
+  summarize  summarize_batch of the top sections per query
+  e2e        extract + embed + rank + summarize for the corpus, per run
+
+Every stage reports count, throughput, mean/p50/p95 latency and peak RSS
+so far. Results go to a JSON file tagged with the git commit, and --compare
+prints the ratios against an earlier result file.
+
+    python benchmarks/bench_e2e.py --pages 5 50 --docs 4
+    python benchmarks/bench_e2e.py --compare benchmarks/results/bench-<commit>.json
+
+Model stages are skipped (and marked so) when the models cannot be loaded;
+ranking then runs on random unit vectors of the same shape.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.backends import EMBED_BACKENDS
+from src.chunking import Chunker, chunk_owners
+from src.models import SUMMARY_MODES, ModelRegistry
+from src.pipeline import embed_records, rank_and_summarize
+from src.ranking import rank_sections
+from src.sections import document_sections
+from synthetic import synthetic_pdf
+
+QUERIES = [
+    ("Travel Planner", "Plan a trip of 4 days for a group of 10 college friends."),
+    ("Food Critic", "Find the best local restaurants and regional cuisine."),
+    ("Historian", "Summarize the history and culture of the region."),
+    ("Family Organizer", "Find family activities and budget hotels for summer."),
+]
+
+
+def git_commit():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"],
+                                             cwd=ROOT, text=True).strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return max(own, children) / 2 ** 20
+
+
+class Stage:
+    def __init__(self, name, unit):
+        self.name = name
+        self.unit = unit
+        self.latencies = []
+        self.items = 0
+
+    @contextlib.contextmanager
+    def time(self, items=1):
+        start = time.perf_counter()
+        yield
+        self.latencies.append(time.perf_counter() - start)
+        self.items += items
+
+    def report(self):
+        if not self.latencies:
+            return {"skipped": True}
+        latencies = np.asarray(self.latencies)
+        total = float(latencies.sum())
+        return {
+            "calls": len(latencies),
+            "items": self.items,
+            "unit": self.unit,
+            "total_s": round(total, 4),
+            "throughput_per_s": round(self.items / total, 2) if total else None,
+            "mean_ms": round(float(latencies.mean()) * 1000, 3),
+            "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 3),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+
+
+def load_models(args):
+    try:
+        models = ModelRegistry(embed_backend=args.embed_backend, summary_mode=args.summary_mode).warm_up()
+    except (ImportError, FileNotFoundError, OSError, AssertionError) as e:
+        print(f"[!] Models unavailable, skipping model stages: {e}")
+        return None
+    return models
+
+
+def bench_corpus(pdfs, models, args):
+    stages = {name: Stage(name, unit) for name, unit in (
+        ("extract", "pages"), ("embed", "sections"), ("rank", "queries"), ("summarize", "sections"), ("e2e", "runs"),
+    )}
+    chunker = Chunker.for_embedder(models.embedder, args.chunk_tokens) if models and args.chunk_tokens else None
+
+    per_doc = []
+    for path, n_pages in pdfs:
+        for _ in range(args.repeat):
+            with stages["extract"].time(n_pages):
+                records = document_sections(path, os.path.basename(path))
+        per_doc.append(records)
+
+    embeddings = []
+    if models is not None:
+        for records in per_doc:
+            if not records:
+                continue
+            for _ in range(args.repeat):
+                with stages["embed"].time(len(records)):
+                    doc_embeddings = embed_records(models.embedder, records, chunker=chunker)
+            embeddings.append(doc_embeddings)
+
+    records = [r for doc in per_doc for r in doc]
+    if not records:
+        print("[!] No sections extracted; try a higher --heading-every or more --pages")
+        return stages
+    if embeddings:
+        matrix = np.concatenate(embeddings)
+        queries = [models.embedder.embed_query(p, j) for p, j in QUERIES]
+    else:
+        rng = np.random.default_rng(0)
+        matrix = rng.normal(size=(len(records), 384)).astype(np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        queries = list(matrix[rng.integers(0, len(records), len(QUERIES))])
+
+    owners = chunk_owners(records)
+    for _ in range(args.repeat):
+        for (persona, job), q in zip(QUERIES, queries):
+            with stages["rank"].time():
+                ranked = rank_sections(q, f"Persona: {persona}. Job: {job}", records, matrix, top_k=7,
+                                       chunk_owner=owners)
+            if models is not None:
+                with stages["summarize"].time(len(ranked)):
+                    models.summarizer.summarize_batch([r["text"] for r in ranked], query_embedding=q)
+
+    if models is not None:
+        for _ in range(args.repeat):
+            with stages["e2e"].time():
+                corpus, corpus_embeddings = [], []
+                for path, _ in pdfs:
+                    doc_records = document_sections(path, os.path.basename(path))
+                    if doc_records:
+                        corpus.extend(doc_records)
+                        corpus_embeddings.append(embed_records(models.embedder, doc_records, chunker=chunker))
+                persona, job = QUERIES[0]
+                rank_and_summarize(models.embedder, models.summarizer, persona, job, corpus,
+                                   np.concatenate(corpus_embeddings))
+    return stages
+
+
+def compare(current, previous_path):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nvs {previous.get('commit', '?')[:10]} ({previous_path}); ratio > 1 means faster now")
+    for corpus, stages in current["corpora"].items():
+        before = previous.get("corpora", {}).get(corpus)
+        if not before:
+            continue
+        for name, now in stages.items():
+            old = before.get(name, {})
+            if "p50_ms" in now and "p50_ms" in old and now["p50_ms"]:
+                print(f"  {corpus:>16} {name:>10}  p50 x{old['p50_ms'] / now['p50_ms']:.2f}"
+                      f"  p95 x{old['p95_ms'] / max(now['p95_ms'], 1e-9):.2f}"
+                      f"  rss {old['peak_rss_mb']:.0f} -> {now['peak_rss_mb']:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 50], help="pages per PDF, one corpus per value")
+    parser.add_argument("--docs", type=int, default=4, help="PDFs per corpus")
+    parser.add_argument("--heading-every", type=int, default=25, help="one heading every N lines")
+    parser.add_argument("--table-every", type=int, default=0, help="one table every N lines (0 = none)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--embed-backend", default="torch", choices=EMBED_BACKENDS)
+    parser.add_argument("--summary-mode", default="abstractive", choices=SUMMARY_MODES)
+    parser.add_argument("--chunk-tokens", type=int, default=256)
+    parser.add_argument("--output", help="result file (default benchmarks/results/bench-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    commit, dirty = git_commit()
+    models = load_models(args)
+    result = {
+        "commit": commit,
+        "dirty": dirty,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "models_loaded": models is not None,
+        "corpora": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_pages in args.pages:
+            pdfs = []
+            for d in range(args.docs):
+                path = os.path.join(tmp, f"synthetic-{n_pages}p-{d}.pdf")
+                synthetic_pdf(path, n_pages, seed=d, heading_every=args.heading_every, table_every=args.table_every)
+                pdfs.append((path, n_pages))
+            stages = bench_corpus(pdfs, models, args)
+            name = f"{args.docs}x{n_pages}p"
+            result["corpora"][name] = {stage.name: stage.report() for stage in stages.values()}
+
+            print(f"\n{name}")
+            print(f"  {'stage':>10} {'items/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'rss MB':>8}")
+            for stage, report in result["corpora"][name].items():
+                if report.get("skipped"):
+                    print(f"  {stage:>10} {'skipped':>10}")
+                    continue
+                print(f"  {stage:>10} {report['throughput_per_s']:>10} {report['p50_ms']:>9} "
+                      f"{report['p95_ms']:>9} {report['peak_rss_mb']:>8}")
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"bench-{(commit or 'unknown')[:10]}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\n[✓] Results saved to {output}")
+
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
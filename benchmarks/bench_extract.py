@@ -0,0 +1,35 @@
+"""Time outline assembly (``build_outline``) on synthetic documents of 10k-200k lines.
+
+    python benchmarks/bench_extract.py --sizes 10000 50000 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.extract import build_outline
+from synthetic import synthetic_blocks
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000, 200000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'lines':>8} {'best (s)':>10} {'lines/s':>12} {'headings':>9}")
+    for n in args.sizes:
+        blocks = synthetic_blocks(n)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = build_outline([dict(b) for b in blocks])
+            best = min(best, time.perf_counter() - start)
+        print(f"{n:>8} {best:>10.3f} {n / best:>12.0f} {len(result['outline']):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare the vectorized ranker in src/ranking.py with the original per-section loop.
+
+Checks that both return the same sections in the same order on a synthetic
+corpus (100k sections by default) and reports the speedup.
+
+    python benchmarks/bench_rank.py --sections 100000 --top-k 5 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.ranking import GENERIC_HEADINGS, rank_sections, tokenize
+from synthetic import HEADING_WORDS, WORDS
+
+
+def legacy_rank(query_embedding, query, sections, embeddings, top_k=5):
+    """The pre-vectorization Embedder.rank_sections_by_query loop (cosine via NumPy instead of sklearn)."""
+    query_tokens = tokenize(query)
+    query_norm = np.linalg.norm(query_embedding)
+    ranked = []
+    for section, section_embedding in zip(sections, embeddings):
+        heading = section.get("heading", "")
+        title = section.get("doc", "")
+        emb_sim = float(np.dot(query_embedding, section_embedding) / (query_norm * np.linalg.norm(section_embedding)))
+        text_tokens = tokenize(title + " " + heading)
+        keyword_overlap = len(query_tokens & text_tokens) / max(1, len(query_tokens))
+        generic_penalty = -0.2 if heading.lower().strip() in GENERIC_HEADINGS else 0.0
+        score = 0.8 * emb_sim + 0.1 * keyword_overlap + generic_penalty
+        ranked.append((score, section))
+    ranked.sort(reverse=True, key=lambda x: x[0])
+    return [s for _, s in ranked[:top_k]]
+
+
+def synthetic_corpus(n_sections, dim=384, n_docs=200, seed=0):
+    rng = random.Random(seed)
+    headings = HEADING_WORDS + [h.title() for h in GENERIC_HEADINGS]
+    docs = [f"{rng.choice(WORDS)} {rng.choice(WORDS)} guide {i}.pdf" for i in range(n_docs)]
+    sections = [
+        {"doc": rng.choice(docs), "page": rng.randint(0, 300), "heading": rng.choice(headings), "text": ""}
+        for _ in range(n_sections)
+    ]
+    embeddings = np.random.default_rng(seed).standard_normal((n_sections, dim)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return sections, embeddings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sections", type=int, default=100000)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[5, 50])
+    parser.add_argument("--queries", type=int, default=3)
+    args = parser.parse_args()
+
+    sections, embeddings = synthetic_corpus(args.sections)
+    rng = np.random.default_rng(1)
+    mismatches = 0
+    legacy_time = fast_time = 0.0
+    for q in range(args.queries):
+        query_embedding = rng.standard_normal(embeddings.shape[1]).astype(np.float32)
+        query_embedding /= np.linalg.norm(query_embedding)
+        query = f"Persona: travel planner. Job: plan a {WORDS[q]} trip with {HEADING_WORDS[q].lower()}"
+        for k in args.top_k:
+            start = time.perf_counter()
+            expected = legacy_rank(query_embedding, query, sections, embeddings, top_k=k)
+            legacy_time += time.perf_counter() - start
+            start = time.perf_counter()
+            got = rank_sections(query_embedding, query, sections, embeddings, top_k=k)
+            fast_time += time.perf_counter() - start
+            if [id(s) for s in got] != [id(s) for s in expected]:
+                mismatches += 1
+                print(f"query {q} top_k={k}: rankings differ")
+
+    runs = args.queries * len(args.top_k)
+    print(f"sections: {args.sections}  runs: {runs}  mismatches: {mismatches}")
+    print(f"legacy: {legacy_time / runs * 1000:.1f} ms/query  vectorized: {fast_time / runs * 1000:.1f} ms/query  "
+          f"speedup: {legacy_time / max(fast_time, 1e-9):.1f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
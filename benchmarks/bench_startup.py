@@ -0,0 +1,105 @@
+"""Cold-start benchmark and regression guard for the CLI.
+
+Starts fresh interpreters for commands that must not load any model stack
+and reports wall time (median and max over --repeat runs), peak RSS and
+the slowest imports (from -X importtime). Exits with status 1 if one of
+them imports torch, transformers, sentence_transformers or onnxruntime,
+or goes over --max-ms / --max-rss-mb.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 10 --max-ms 1500 --max-rss-mb 200
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_pdf
+
+HEAVY = ("torch", "transformers", "sentence_transformers", "onnxruntime")
+
+
+def scenarios(pdf, out_dir):
+    scrybe = os.path.join(ROOT, "scrybe.py")
+    return {
+        "help": [scrybe, "--help"],
+        "outline": [scrybe, "outline", pdf, "--cache-dir", "", "--output-dir", out_dir],
+        "rank --help": [scrybe, "rank", "--help"],
+        "import main/serve/index": ["-c", "import main, serve, index"],
+    }
+
+
+def run_once(argv, extra=()):
+    """(wall seconds, peak RSS in MB, stderr) of one fresh interpreter."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, *extra, *argv], cwd=ROOT, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True)
+    stderr = proc.stderr.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} exited with {proc.returncode}:\n{stderr}")
+    scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is KiB on Linux, bytes on macOS
+    return elapsed, usage.ru_maxrss * scale / 2 ** 20, stderr
+
+
+def import_profile(argv):
+    """({top-level package: cumulative import µs}, set of every imported module) from -X importtime."""
+    _, _, stderr = run_once(argv, extra=("-X", "importtime"))
+    modules, cumulative = set(), {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not cum.isdigit():
+            continue  # header line
+        modules.add(name)
+        if not name.startswith(" ") and "." not in name:
+            cumulative[name] = max(cumulative.get(name, 0), int(cum))
+    return cumulative, modules
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, help="fail if a command's median wall time exceeds this")
+    parser.add_argument("--max-rss-mb", type=float, help="fail if a command's peak RSS exceeds this")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = synthetic_pdf(os.path.join(tmp, "startup.pdf"), 2)
+        print(f"{'command':>24} {'median ms':>10} {'max ms':>8} {'rss MB':>7}  slowest imports (cumulative ms)")
+        for name, argv in scenarios(pdf, os.path.join(tmp, "out")).items():
+            runs = [run_once(argv) for _ in range(args.repeat)]
+            wall = [elapsed * 1000 for elapsed, _, _ in runs]
+            rss = max(peak for _, peak, _ in runs)
+            cumulative, modules = import_profile(argv)
+            slowest = sorted(cumulative.items(), key=lambda item: -item[1])[:4]
+            print(f"{name:>24} {statistics.median(wall):>10.1f} {max(wall):>8.1f} {rss:>7.1f}  "
+                  + ", ".join(f"{module} {us / 1000:.0f}" for module, us in slowest))
+
+            heavy = sorted(m for m in HEAVY if m in {module.strip() for module in modules})
+            if heavy:
+                failures.append(f"{name} imports {', '.join(heavy)}")
+            if args.max_ms and statistics.median(wall) > args.max_ms:
+                failures.append(f"{name} took {statistics.median(wall):.0f} ms (budget {args.max_ms:.0f})")
+            if args.max_rss_mb and rss > args.max_rss_mb:
+                failures.append(f"{name} peaked at {rss:.0f} MB (budget {args.max_rss_mb:.0f})")
+
+    for failure in failures:
+        print(f"[!] {failure}")
+    if failures:
+        sys.exit(1)
+    print("[✓] No model stack imported at startup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Accuracy and speed of detect_table_regions against the previous tuple-key heuristic.
+
+Runs both detectors on table-dense synthetic pages where every table cell is
+labelled, with aligned and ragged (jittered, missing cells) tables.
+
+    python benchmarks/bench_tables.py --lines 50000
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.blockstore import BlockStore
+from src.extract import detect_table_regions
+from synthetic import synthetic_blocks
+
+
+def legacy_table_mask(blocks, y_tolerance=2, x_tolerance=5):
+    """The previous group_blocks_into_rows + detect_table_like_groups + list scan, as a mask."""
+    rows = defaultdict(list)
+    for block in blocks:
+        rows[round(block["y0"] / y_tolerance) * y_tolerance].append(block)
+    column_patterns = defaultdict(list)
+    for row in rows.values():
+        x_positions = sorted([round((b["x0"] + b["x1"]) / 2) for b in row])
+        key = tuple([round(x / x_tolerance) * x_tolerance for x in x_positions])
+        if len(key) > 1:
+            column_patterns[key].append(row)
+    table_blocks = [b for rows in column_patterns.values() if len(rows) >= 3 for row in rows for b in row]
+    return np.array([b in table_blocks for b in blocks], dtype=bool)
+
+
+def scores(predicted, truth):
+    tp = int((predicted & truth).sum())
+    precision = tp / max(1, int(predicted.sum()))
+    recall = tp / max(1, int(truth.sum()))
+    return precision, recall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--table-every", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'tables':>8} {'detector':>8} {'precision':>10} {'recall':>8} {'time (s)':>9}")
+    for ragged in (False, True):
+        blocks = synthetic_blocks(args.lines, seed=3, heading_every=40, table_every=args.table_every, ragged=ragged)
+        truth = np.array([b["in_table"] for b in blocks], dtype=bool)
+        store = BlockStore.from_blocks(blocks)
+
+        start = time.perf_counter()
+        legacy = legacy_table_mask(blocks)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        regions = detect_table_regions(store)
+        regions_time = time.perf_counter() - start
+
+        label = "ragged" if ragged else "aligned"
+        for name, mask, elapsed in (("legacy", legacy, legacy_time), ("regions", regions, regions_time)):
+            precision, recall = scores(mask, truth)
+            print(f"{label:>8} {name:>8} {precision:>10.3f} {recall:>8.3f} {elapsed:>9.3f}")
+        print(f"{'':>8} {len(blocks)} lines, {int(truth.sum())} table cells")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Accuracy and latency of an inference backend against the fp32 torch baseline.
+
+For every case under input/ (a JSON plus a pdf/ or pdfs/ folder) the
+sections are embedded, ranked and summarized with both setups. Reported per
+backend: mean cosine between embeddings, top-k overlap and identical-order
+rate of the rankings, exact-match rate and token F1 of the summaries, and
+embedding/summary time. Exits with status 1 when the top-k overlap falls
+below --min-overlap.
+
+    python run.py --onnx   # only needed for the onnx backends
+    python benchmarks/check_backends.py --embed-backend onnx-int8 --summary-backend int8
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.backends import EMBED_BACKENDS, SUMMARY_BACKENDS
+from src.models import ModelRegistry
+from src.sections import document_sections
+
+
+def load_cases(input_dir):
+    cases = []
+    for case_dir in sorted(glob.glob(os.path.join(input_dir, "*"))):
+        json_files = glob.glob(os.path.join(case_dir, "*.json"))
+        pdf_dir = next((d for d in (os.path.join(case_dir, "pdf"), os.path.join(case_dir, "pdfs")) if os.path.isdir(d)), None)
+        if not json_files or pdf_dir is None:
+            continue
+        with open(json_files[0]) as f:
+            data = json.load(f)
+        records = []
+        for doc in data["documents"]:
+            path = os.path.join(pdf_dir, doc["filename"])
+            if os.path.exists(path):
+                records += document_sections(path, doc["filename"])
+        if records:
+            cases.append((os.path.basename(case_dir), data["persona"]["role"], data["job_to_be_done"]["task"], records))
+    return cases
+
+
+def run(models, persona, job, records, top_k):
+    embedder, summarizer = models.embedder, models.summarizer
+    start = time.perf_counter()
+    embeddings = embedder.embed_sections([r["text"] + r["doc"] for r in records])
+    query_embedding = embedder.embed_query(persona, job)
+    embed_time = time.perf_counter() - start
+    ranked = embedder.rank_sections_by_query(query_embedding, f"Persona: {persona}. Job: {job}", records, embeddings,
+                                             top_k=top_k)
+    start = time.perf_counter()
+    summaries = summarizer.summarize_batch([r["text"] for r in ranked])
+    summary_time = time.perf_counter() - start
+    keys = [(r["doc"], r["page"], r["heading"]) for r in ranked]
+    return embeddings, keys, summaries, embed_time, summary_time
+
+
+def token_f1(a, b):
+    a, b = a.lower().split(), b.lower().split()
+    common = sum((Counter(a) & Counter(b)).values())
+    if not common:
+        return float(a == b)
+    precision, recall = common / len(b), common / len(a)
+    return 2 * precision * recall / (precision + recall)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default="input")
+    parser.add_argument("--embed-backend", default="int8", choices=EMBED_BACKENDS)
+    parser.add_argument("--summary-backend", default="int8", choices=SUMMARY_BACKENDS)
+    parser.add_argument("--top-k", type=int, default=7)
+    parser.add_argument("--min-overlap", type=float, default=0.8)
+    args = parser.parse_args()
+
+    cases = load_cases(args.input)
+    if not cases:
+        sys.exit(f"no cases with sections under {args.input}/")
+
+    baseline = ModelRegistry().warm_up()
+    candidate = ModelRegistry(embed_backend=args.embed_backend, summary_backend=args.summary_backend).warm_up()
+
+    cosines, overlaps, same_order, exact, f1s = [], [], [], [], []
+    times = {"baseline": [0.0, 0.0], "candidate": [0.0, 0.0]}
+    for name, persona, job, records in cases:
+        ref = run(baseline, persona, job, records, args.top_k)
+        got = run(candidate, persona, job, records, args.top_k)
+        for label, result in (("baseline", ref), ("candidate", got)):
+            times[label][0] += result[3]
+            times[label][1] += result[4]
+
+        cosines.append(float(np.mean(np.sum(ref[0] * got[0], axis=1))))
+        overlaps.append(len(set(ref[1]) & set(got[1])) / max(1, len(ref[1])))
+        same_order.append(ref[1] == got[1])
+        # compare summaries of the same sections, whatever rank they landed at
+        by_key = dict(zip(got[1], got[2]))
+        pairs = [(s, by_key[k]) for k, s in zip(ref[1], ref[2]) if k in by_key]
+        exact += [a == b for a, b in pairs]
+        f1s += [token_f1(a, b) for a, b in pairs]
+        print(f"[DEBUG] {name}: {len(records)} sections, top-{args.top_k} overlap {overlaps[-1]:.2f}")
+
+    print(f"\nembed backend {args.embed_backend}, summary backend {args.summary_backend}, {len(cases)} case(s)")
+    print(f"  embedding cosine to fp32   {np.mean(cosines):.4f}")
+    print(f"  top-{args.top_k} overlap            {np.mean(overlaps):.3f}")
+    print(f"  identical ranking          {np.mean(same_order):.3f}")
+    print(f"  summary exact match        {np.mean(exact) if exact else float('nan'):.3f}")
+    print(f"  summary token F1           {np.mean(f1s) if f1s else float('nan'):.3f}")
+    for label, (embed_time, summary_time) in times.items():
+        print(f"  {label:<9} embed {embed_time:.2f}s  summarize {summary_time:.2f}s")
+
+    if np.mean(overlaps) < args.min_overlap:
+        print(f"[!] top-{args.top_k} overlap below {args.min_overlap}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
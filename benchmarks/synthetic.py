@@ -0,0 +1,97 @@
+import random
+
+WORDS = (
+    "travel guide city coast museum market wine river castle harbour village "
+    "festival beach route train budget hotel restaurant cuisine history art "
+    "season summer winter local region culture walk tour view garden square"
+).split()
+
+HEADING_WORDS = ["Planning", "Overview", "Getting Around", "Where To Stay", "Food And Drink",
+                 "Nightlife", "Day Trips", "Packing Tips", "Local Customs", "Family Activities"]
+
+PAGE_HEIGHT = 842
+LINE_HEIGHT = 14
+
+
+def _sentence(rng, n_words):
+    words = [rng.choice(WORDS) for _ in range(n_words)]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + "."
+
+
+def synthetic_blocks(n_lines, seed=0, heading_every=25, table_every=0, lines_per_page=50, ragged=False):
+    """
+    Block dicts (the fields BlockStore.from_blocks reads): title, headings,
+    body text and optional table rows. Table cells carry "in_table": True.
+    With ragged=True, table cells jitter by a few points and rows sometimes
+    miss a cell.
+    """
+    rng = random.Random(seed)
+    blocks = []
+
+    def add(text, size, font, page, x0, y0, width, in_table=False):
+        blocks.append({
+            "id": len(blocks),
+            "text": text,
+            "font_size": size,
+            "font_name": font,
+            "page": page,
+            "x0": x0,
+            "x1": x0 + width,
+            "y0": y0,
+            "y1": y0 + size + 2,
+            "in_table": in_table,
+        })
+
+    page, y = 0, 36.0
+    add("Synthetic Corpus Handbook", 20.0, "Helvetica-Bold", page, 72, y, 300)
+    y += 180
+    while len(blocks) < n_lines:
+        if y > PAGE_HEIGHT - 60 or len(blocks) % lines_per_page == 0:
+            page += 1
+            y = 60.0 + round(rng.uniform(0, 40), 1)
+        kind = len(blocks) % heading_every
+        if kind == 0:
+            y += 12
+            text = f"{rng.choice(HEADING_WORDS)} {rng.choice(HEADING_WORDS).split()[0]}"
+            add(text, rng.choice([14.0, 16.0]), "Helvetica-Bold", page, 72, y, 200)
+            y += 30
+        elif table_every and len(blocks) % table_every == 0:
+            columns = rng.choice([3, 4])
+            for _ in range(rng.randint(3, 6)):
+                for c in range(columns):
+                    if ragged and c > 0 and rng.random() < 0.15:
+                        continue
+                    jitter = rng.uniform(-2, 2) if ragged else 0
+                    add(str(rng.randint(10, 999)), 9.0, "Helvetica", page, 72 + c * 120 + jitter, y, 40, True)
+                y += LINE_HEIGHT
+        else:
+            text = _sentence(rng, rng.choice([6, 12, 18, 24]))
+            add(text, 10.0, "Helvetica", page, 72, y, 450)
+            y += LINE_HEIGHT
+    return blocks[:n_lines]
+
+
+PDF_FONTS = {"Helvetica": "helv", "Helvetica-Bold": "hebo"}
+
+
+def write_pdf(blocks, path, page_width=1000):
+    """Renders synthetic blocks into a real PDF with PyMuPDF (pages wide enough for the longest lines)."""
+    import fitz
+
+    doc = fitz.open()
+    for _ in range(max(b["page"] for b in blocks) + 1):
+        doc.new_page(width=page_width, height=PAGE_HEIGHT)
+    for b in blocks:
+        doc[b["page"]].insert_text((b["x0"], b["y0"] + b["font_size"]), b["text"],
+                                   fontsize=b["font_size"], fontname=PDF_FONTS[b["font_name"]])
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return path
+
+
+def synthetic_pdf(path, n_pages, seed=0, heading_every=25, table_every=0, lines_per_page=50):
+    """A PDF of about n_pages pages; returns the path."""
+    blocks = synthetic_blocks(n_pages * lines_per_page, seed=seed, heading_every=heading_every,
+                              table_every=table_every, lines_per_page=lines_per_page)
+    return write_pdf(blocks, path)
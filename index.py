@@ -0,0 +1,69 @@
+import argparse
+import os
+
+from src import tracing
+from src.backends import EMBED_BACKENDS
+from src.chunking import Chunker
+from src.indexer import CorpusIndex
+from src.models import ModelRegistry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally index a folder of PDFs: only new or changed "
+                                                 "files are extracted (and embedded), deleted ones are dropped")
+    parser.add_argument("pdf_dir")
+    parser.add_argument("--index-dir", help="where the manifest lives (default cache/index/<folder>-<hash>)")
+    parser.add_argument("--cache-dir", default="cache/outlines",
+                        help="on-disk outline cache keyed by PDF content hash ('' disables it)")
+    parser.add_argument("--embeddings-dir", default="cache/embeddings",
+                        help="on-disk section embedding store keyed by PDF hash and model ('' disables it)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes used to extract outlines in parallel (1 = serial)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="extract outlines page by page with bounded memory (for very large PDFs)")
+    parser.add_argument("--embed", action="store_true", help="also embed new and changed sections")
+    parser.add_argument("--embed-backend", default="torch", choices=EMBED_BACKENDS,
+                        help="embedding inference backend (with --embed)")
+    parser.add_argument("--chunk-tokens", type=int, default=256,
+                        help="split sections into chunks of at most this many tokens before embedding (0 = whole sections)")
+    parser.add_argument("--chunk-overlap", type=int, default=32, help="tokens shared by consecutive chunks")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="try files that failed on an earlier run again even if they have not changed")
+    parser.add_argument("--purge", action="store_true",
+                        help="after updating, delete cache entries of removed or replaced files that no index "
+                             "under the same root still uses (embeddings only for the --embed model)")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="append per-stage spans and counters to this JSON lines file")
+    parser.add_argument("--debug", action="store_true", help="print debug output (full outlines, section counts)")
+    args = parser.parse_args(argv)
+
+    tracing.configure(args.trace, args.debug)
+    embedder = chunker = None
+    if args.embed:
+        embedder = ModelRegistry(embed_backend=args.embed_backend).embedder
+        if args.chunk_tokens:
+            chunker = Chunker.for_embedder(embedder, args.chunk_tokens, args.chunk_overlap)
+
+    index = CorpusIndex(args.pdf_dir, index_dir=args.index_dir, cache_dir=args.cache_dir,
+                        embeddings_dir=args.embeddings_dir, streaming=args.streaming)
+    report = index.update(embedder, chunker, workers=args.workers, retry_failed=args.retry_failed)
+
+    for key in ("added", "changed", "removed"):
+        for name in report[key]:
+            print(f"[{key}] {name}")
+    print(f"[✓] {report['documents']} documents, {report['sections']} sections indexed "
+          f"({len(report['added'])} added, {len(report['changed'])} changed, {len(report['removed'])} removed, "
+          f"{report['unchanged'] + len(report['touched'])} unchanged)")
+    if args.purge:
+        print(f"[✓] Purged cache entries of {index.purge(embedder)} orphaned document(s)")
+    elif report["orphaned"]:
+        print(f"[!] {report['orphaned']} removed or replaced document(s) still have cache entries; run with --purge")
+    if report["skipped"]:
+        print(f"[!] Skipped {len(report['skipped'])} unchanged document(s) that failed before "
+              f"(--retry-failed to try again): {', '.join(report['skipped'])}")
+    if report["failed"]:
+        print(f"[!] {len(report['failed'])} document(s) failed: {', '.join(f['document'] for f in report['failed'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,112 +1,68 @@
 import os
+import re
 import json
-import torch
-import numpy as np
-from datetime import datetime
-from src.embed import Embedder
-from src.extract import extract_outline
-from src.summarizer import Summarizer
-import fitz  # PyMuPDF
+import argparse
+from src import tracing
+from src.backends import EMBED_BACKENDS, SUMMARY_BACKENDS
+from src.models import SUMMARY_MODES, ModelRegistry, get_registry
+from src.chunking import POOLING, Chunker
+from src.pipeline import build_ann_index, build_output, extract_and_embed, rank_and_summarize, rank_and_summarize_many
+from src.vector_store import EmbeddingStore
 
 def load_input(input_path):
     with open(input_path, 'r') as f:
         return json.load(f)
 
-def extract_section_text(pdf_path, page_number, heading_text):
-    doc = fitz.open(pdf_path)
-    if page_number >= len(doc):
-        return ""
-    page = doc[page_number]
-    text_instances = page.search_for(heading_text.strip(), quads=False)
-    if not text_instances:
-        return ""
-    found = text_instances[0]
-    text = page.get_textbox(found).strip()
-    return text
-
-def process_case(json_path, pdf_dir, output_path):
-    input_data = load_input(json_path)
-    persona = input_data['persona']['role']
-    job = input_data['job_to_be_done']['task']
-    documents = input_data['documents']
-
-    embedder = Embedder()
-    summarizer = Summarizer()
-
-    query_string = f"Persona: {persona}. Job: {job}"
-    query_embedding = embedder.embed_query(persona, job)
-
-    section_records = []
+def case_documents(documents, pdf_dir):
+    """(filepath, filename) for every document of a case whose PDF exists."""
+    pending = []
     for doc in documents:
         filename = doc["filename"]
         filepath = os.path.join(pdf_dir, filename)
         if not os.path.exists(filepath):
             print(f"[!] File not found: {filepath}")
             continue
+        pending.append((filepath, filename))
+    return pending
+
+def process_case(json_path, pdf_dir, output_path, workers=1, models=None, cache_dir=None, embeddings_dir=None,
+                 streaming=False, chunk_tokens=256, chunk_overlap=32, pooling="max"):
+    with tracing.span("case", case=os.path.basename(os.path.dirname(json_path))):
+        _process_case(json_path, pdf_dir, output_path, workers, models, cache_dir, embeddings_dir, streaming,
+                      chunk_tokens, chunk_overlap, pooling)
 
-        outline_data = extract_outline(filepath)
-        print(f"[DEBUG] Outline for {filename}:", json.dumps(outline_data, indent=2))
+def _process_case(json_path, pdf_dir, output_path, workers, models, cache_dir, embeddings_dir, streaming,
+                  chunk_tokens, chunk_overlap, pooling):
+    input_data = load_input(json_path)
+    persona = input_data['persona']['role']
+    job = input_data['job_to_be_done']['task']
+    documents = input_data['documents']
 
-        for section in outline_data.get("outline", []):
-            page_num = section["page"]
-            heading_text = section["text"]
-            section_text = section.get("section_text", "")
+    pending = case_documents(documents, pdf_dir)
 
-            if not section_text or len(section_text) < 50:
-                continue
+    models = models or get_registry()
+    embedder = models.embedder
+    summarizer = models.summarizer
+    chunker = Chunker.for_embedder(embedder, chunk_tokens, chunk_overlap) if chunk_tokens else None
 
-            section_records.append({
-                "doc": filename,
-                "page": page_num,
-                "heading": heading_text,
-                "text": section_text
-            })
+    store = EmbeddingStore(embeddings_dir, embedder.model_id) if embeddings_dir else None
 
-    print(f"[DEBUG] Extracted {len(section_records)} sections.")
+    section_records, section_embeddings, failures = extract_and_embed(pending, embedder, workers, cache_dir, store,
+                                                                      chunker, streaming)
+    if failures:
+        print(f"[!] {len(failures)} document(s) failed: {', '.join(failures)}")
+
+    tracing.debug(f"Extracted {len(section_records)} sections.")
     if not section_records:
         print("[!] No valid sections found.")
         return
 
-    section_texts = [(s["text"] + s["doc"]) for s in section_records]
-    section_embeddings = embedder.embed_sections(section_texts)
-    ranked_sections = embedder.rank_sections_by_query(query_embedding, query_string, section_records, section_embeddings)
-
-    top_k = min(7, len(ranked_sections))
-    top_sections = []
-    for rank, section in enumerate(ranked_sections[:top_k], 1):
-        summary = summarizer.summarize(section["text"])
-        top_sections.append({
-            "document": section["doc"],
-            "page_number": section["page"],
-            "section_title": section["heading"],
-            "importance_rank": rank,
-            "refined_text": summary
-        })
-        print(f"[RANK {rank}] Section: {section['heading']}")
-
-    output = {
-        "metadata": {
-            "documents": [d["filename"] for d in documents],
-            "persona": persona,
-            "job_to_be_done": job,
-            "processed_at": datetime.utcnow().isoformat() + "Z"
-        },
-        "extracted_sections": [
-            {
-                "document": s["document"],
-                "page_number": s["page_number"],
-                "section_title": s["section_title"],
-                "importance_rank": s["importance_rank"]
-            } for s in top_sections
-        ],
-        "subsection_analysis": [
-            {
-                "document": s["document"],
-                "page_number": s["page_number"],
-                "refined_text": s["refined_text"]
-            } for s in top_sections
-        ]
-    }
+    top_sections = rank_and_summarize(embedder, summarizer, persona, job, section_records, section_embeddings,
+                                      pooling=pooling)
+    for section in top_sections:
+        print(f"[RANK {section['importance_rank']}] Section: {section['section_title']}")
+
+    output = build_output([d["filename"] for d in documents], persona, job, top_sections)
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     with open(output_path, 'w') as f:
@@ -114,7 +70,87 @@ def process_case(json_path, pdf_dir, output_path):
 
     print(f"[✓] Done. Output saved to {output_path}")
 
-def main():
+def batch_queries(input_data):
+    """(id, persona, job) per query of a batch input: a "queries" list of {id?, persona, job_to_be_done}."""
+    queries = []
+    for i, query in enumerate(input_data["queries"], 1):
+        query_id = re.sub(r"[^\w.-]+", "_", str(query.get("id") or f"query-{i:04d}"))
+        queries.append((query_id, query["persona"]["role"], query["job_to_be_done"]["task"]))
+    return queries
+
+def process_batch(json_path, pdf_dir, output_dir, workers=1, models=None, cache_dir=None, embeddings_dir=None,
+                  streaming=False, chunk_tokens=256, chunk_overlap=32, pooling="max", ann_probe=0):
+    """
+    Like process_case for every query in the input's "queries" list; writes
+    output_dir/<id>.json per query. ann_probe > 0 ranks through an approximate
+    IVF index scanning that many lists (see src.ann) instead of exact search.
+    """
+    with tracing.span("batch", case=os.path.basename(os.path.dirname(json_path))):
+        _process_batch(json_path, pdf_dir, output_dir, workers, models, cache_dir, embeddings_dir, streaming,
+                       chunk_tokens, chunk_overlap, pooling, ann_probe)
+
+def _process_batch(json_path, pdf_dir, output_dir, workers, models, cache_dir, embeddings_dir, streaming,
+                   chunk_tokens, chunk_overlap, pooling, ann_probe):
+    input_data = load_input(json_path)
+    queries = batch_queries(input_data)
+    documents = input_data['documents']
+
+    models = models or get_registry()
+    embedder = models.embedder
+    chunker = Chunker.for_embedder(embedder, chunk_tokens, chunk_overlap) if chunk_tokens else None
+    store = EmbeddingStore(embeddings_dir, embedder.model_id) if embeddings_dir else None
+
+    # the corpus is extracted and embedded once for all queries
+    section_records, section_embeddings, failures = extract_and_embed(case_documents(documents, pdf_dir), embedder,
+                                                                      workers, cache_dir, store, chunker, streaming)
+    if failures:
+        print(f"[!] {len(failures)} document(s) failed: {', '.join(failures)}")
+    if not section_records:
+        print("[!] No valid sections found.")
+        return
+
+    results = rank_and_summarize_many(embedder, models.summarizer, [(p, j) for _, p, j in queries],
+                                      section_records, section_embeddings, pooling=pooling,
+                                      index=build_ann_index(section_embeddings, ann_probe))
+
+    os.makedirs(output_dir, exist_ok=True)
+    filenames = [d["filename"] for d in documents]
+    for (query_id, persona, job), top_sections in zip(queries, results):
+        with open(os.path.join(output_dir, f"{query_id}.json"), 'w') as f:
+            json.dump(build_output(filenames, persona, job, top_sections), f, indent=2)
+
+    print(f"[✓] Done. {len(queries)} outputs saved to {output_dir}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes used to extract outlines in parallel (1 = serial)")
+    parser.add_argument("--cache-dir", default="cache/outlines",
+                        help="on-disk outline cache keyed by PDF content hash ('' disables it)")
+    parser.add_argument("--embeddings-dir", default="cache/embeddings",
+                        help="on-disk section embedding store keyed by PDF hash and model ('' disables it)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="extract outlines page by page with bounded memory (for very large PDFs)")
+    parser.add_argument("--embed-backend", default="torch", choices=EMBED_BACKENDS,
+                        help="embedding inference backend (onnx/onnx-int8 need `python run.py --onnx`)")
+    parser.add_argument("--summary-backend", default="torch", choices=SUMMARY_BACKENDS,
+                        help="summarization inference backend")
+    parser.add_argument("--summary-mode", default="abstractive", choices=SUMMARY_MODES,
+                        help="abstractive: T5 beam search; extractive: the sentences closest to the query (much faster)")
+    parser.add_argument("--chunk-tokens", type=int, default=256,
+                        help="split sections into chunks of at most this many tokens before embedding (0 = whole sections)")
+    parser.add_argument("--chunk-overlap", type=int, default=32, help="tokens shared by consecutive chunks")
+    parser.add_argument("--chunk-pooling", default="max", choices=POOLING,
+                        help="how chunk similarities are combined into one section score")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="append per-stage spans and counters to this JSON lines file")
+    parser.add_argument("--debug", action="store_true", help="print debug output (full outlines, section counts)")
+    args = parser.parse_args(argv)
+
+    tracing.configure(args.trace, args.debug)
+    models = ModelRegistry(embed_backend=args.embed_backend, summary_backend=args.summary_backend,
+                           summary_mode=args.summary_mode).warm_up()
+
     input_base = "input"
     output_base = "output"
 
@@ -138,7 +174,9 @@ def main():
 
         output_path = os.path.join(output_base, f"{testcase}.json")
         print(f"\n[★] Processing {testcase}...")
-        process_case(json_path, pdf_dir, output_path)
+        process_case(json_path, pdf_dir, output_path, workers=args.workers, models=models,
+                     cache_dir=args.cache_dir, embeddings_dir=args.embeddings_dir, streaming=args.streaming,
+                     chunk_tokens=args.chunk_tokens, chunk_overlap=args.chunk_overlap, pooling=args.chunk_pooling)
 
 if __name__ == "__main__":
     main()
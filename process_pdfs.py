@@ -1,18 +1,81 @@
-import os
+import argparse
 import json
-from src.extract import extract_outline
+import os
+from src.bulk import BulkRunner, output_name, print_report
+from src.cache import OutlineCache, atomic_write_bytes
+from src.indexer import CorpusIndex
 
 INPUT_DIR = "input"
 OUTPUT_DIR = "output"
+CACHE_DIR = "cache/outlines"
+
+
+def remove_output(output_dir, filename):
+    output_path = os.path.join(output_dir, output_name(filename))
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract the outline of every PDF in a folder to <name>.json")
+    parser.add_argument("--input-dir", default=INPUT_DIR)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help="on-disk outline cache keyed by PDF content hash ('' disables it)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="extraction processes")
+    parser.add_argument("--timeout", type=float, default=120.0,
+                        help="seconds a single PDF may take before its worker is killed (0 = no limit)")
+    parser.add_argument("--max-tasks-per-worker", type=int, default=50,
+                        help="replace a worker after this many files to cap memory growth (0 = never)")
+    parser.add_argument("--retries", type=int, default=1, help="extra attempts for a file that fails")
+    parser.add_argument("--retry-timeouts", action="store_true", help="also retry files that timed out")
+    parser.add_argument("--streaming", action="store_true",
+                        help="extract outlines page by page with bounded memory (for very large PDFs)")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="try files that failed on an earlier run again even if they have not changed")
+    parser.add_argument("--full", action="store_true",
+                        help="process every PDF instead of only those added or changed since the last run")
+    parser.add_argument("--report", metavar="PATH", help="also write the report with per-file timings as JSON")
+    args = parser.parse_args(argv)
+
+    if args.cache_dir:
+        OutlineCache(args.cache_dir).evict()
+    runner = BulkRunner(workers=args.workers, timeout=args.timeout or None,
+                        max_tasks_per_worker=args.max_tasks_per_worker, retries=args.retries,
+                        retry_timeouts=args.retry_timeouts, cache_dir=args.cache_dir, streaming=args.streaming,
+                        output_dir=args.output_dir)
+
+    if args.full:
+        names = sorted(f for f in os.listdir(args.input_dir) if f.lower().endswith(".pdf"))
+        for result in runner.run([(os.path.join(args.input_dir, name), name) for name in names]):
+            if result["status"] != "ok":
+                # there is no outline of the file as it is now, so an older one must not be left behind
+                remove_output(args.output_dir, result["document"])
+    else:
+        # Only PDFs added or changed since the last run are extracted; outputs of deleted PDFs, and of
+        # changed ones that now fail, are removed
+        index = CorpusIndex(args.input_dir, cache_dir=args.cache_dir, embeddings_dir=None, streaming=args.streaming)
+        changes = index.update(extract=runner.iter_sections, retry_failed=args.retry_failed)
+        if changes["skipped"]:
+            print(f"[!] Skipped {len(changes['skipped'])} unchanged PDF(s) that failed before "
+                  f"(--retry-failed to try again): {', '.join(changes['skipped'])}")
+        for filename in changes["removed"] + [failure["document"] for failure in changes["failed"]]:
+            remove_output(args.output_dir, filename)
+        for filename in sorted(index.files):
+            output_path = os.path.join(args.output_dir, output_name(filename))
+            if os.path.exists(output_path):
+                continue
+            try:
+                result = index.outline(filename)
+                atomic_write_bytes(output_path, json.dumps(result, indent=2, ensure_ascii=False).encode("utf-8"))
+            except Exception as e:
+                print(f"❌ Error processing {filename}: {e}")
+
+    report = runner.report()
+    print_report(report)
+    if args.report:
+        atomic_write_bytes(args.report, json.dumps(report, indent=2).encode("utf-8"))
+
 
-for filename in os.listdir(INPUT_DIR):
-    if filename.lower().endswith(".pdf"):
-        pdf_path = os.path.join(INPUT_DIR, filename)
-        try:
-            result = extract_outline(pdf_path)
-            output_filename = filename.replace(".pdf", ".json")
-            with open(os.path.join(OUTPUT_DIR, output_filename), "w", encoding="utf-8") as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            
-        except Exception as e:
-            print(f"❌ Error processing {filename}: {e}")
+if __name__ == "__main__":
+    main()
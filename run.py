@@ -1,23 +1,40 @@
-from sentence_transformers import SentenceTransformer
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+import argparse
 import os
 
+parser = argparse.ArgumentParser(description="Download the models and optionally prepare optimized backends")
+parser.add_argument("--onnx", action="store_true",
+                    help="also export the embedding model to ONNX (graph-optimized, plus an int8 copy) for --embed-backend onnx/onnx-int8")
+parser.add_argument("--no-onnx-int8", action="store_true", help="skip the int8 ONNX copy")
+parser.add_argument("--skip-download", action="store_true", help="reuse models already under models/")
+args = parser.parse_args()
+
 # Create base model directory
 os.makedirs("models/embedding_model", exist_ok=True)
 os.makedirs("models/summary_model", exist_ok=True)
 
-# Download and save SentenceTransformer model
-print("Downloading SentenceTransformer model...")
-sbert_model = SentenceTransformer("all-MiniLM-L6-v2")
-sbert_model.save("models/embedding_model")
+if not args.skip_download:
+    from sentence_transformers import SentenceTransformer
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+    # Download and save SentenceTransformer model
+    print("Downloading SentenceTransformer model...")
+    sbert_model = SentenceTransformer("all-MiniLM-L6-v2")
+    sbert_model.save("models/embedding_model")
+
+    # Download and save T5-small model
+    print("Downloading T5-small model...")
+    model_name = "t5-small"
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    t5_model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+
+    tokenizer.save_pretrained("models/summary_model")
+    t5_model.save_pretrained("models/summary_model")
 
-# Download and save T5-small model
-print("Downloading T5-small model...")
-model_name = "t5-small"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-t5_model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    print("All models downloaded and saved.")
 
-tokenizer.save_pretrained("models/summary_model")
-t5_model.save_pretrained("models/summary_model")
+if args.onnx:
+    from src.backends import export_onnx
 
-print("All models downloaded and saved.")
+    print("Exporting embedding model to ONNX...")
+    out_dir = export_onnx("models/embedding_model", quantize=not args.no_onnx_int8)
+    print(f"ONNX models saved to {out_dir}.")
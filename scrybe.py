@@ -0,0 +1,192 @@
+"""
+Single entry point for every Scrybe job.
+
+    python scrybe.py outline PDF... [--output-dir DIR]     title + headings (PyMuPDF only)
+    python scrybe.py rank CASE.json --pdf-dir DIR           top sections for the case's persona/job (embedder only)
+    python scrybe.py batch QUERIES.json --output-dir DIR    many persona/job pairs over one corpus, one output each
+    python scrybe.py run [main.py options]                  full pipeline over input/, as main.py
+    python scrybe.py serve [serve.py options]               HTTP service, as serve.py
+    python scrybe.py index PDF_DIR [index.py options]       incremental index refresh, as index.py
+
+Only the chosen subcommand's modules are imported, and models load when a
+subcommand first uses them, so `outline` never pays for torch or
+transformers. benchmarks/bench_startup.py keeps it that way.
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+
+# subcommands implemented by the existing scripts; each exposes main(argv)
+SCRIPTS = {"run": "main", "serve": "serve", "index": "index"}
+
+
+def outline(argv):
+    parser = argparse.ArgumentParser(prog="scrybe.py outline", description="Extract title and headings from PDFs")
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--output-dir", help="write <name>.json per PDF here instead of printing")
+    parser.add_argument("--cache-dir", default="cache/outlines",
+                        help="on-disk outline cache keyed by PDF content hash ('' disables it)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="extract outlines page by page with bounded memory (for very large PDFs)")
+    args = parser.parse_args(argv)
+
+    from src.cache import OutlineCache
+    from src.extract import extract_outline
+    from src.streaming import extract_outline_streaming
+
+    cache = OutlineCache(args.cache_dir) if args.cache_dir else None
+    failed = 0
+    for path in args.pdfs:
+        try:
+            if cache is not None:
+                result = cache.get_or_extract(path, streaming=args.streaming)
+            else:
+                result = extract_outline_streaming(path) if args.streaming else extract_outline(path)
+        except Exception as e:
+            print(f"❌ Error processing {path}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            name = os.path.splitext(os.path.basename(path))[0] + ".json"
+            with open(os.path.join(args.output_dir, name), "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2, ensure_ascii=False)
+        else:
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+    if cache is not None:
+        cache.evict()
+    return 1 if failed else 0
+
+
+def rank(argv):
+    from src.backends import EMBED_BACKENDS
+    from src.chunking import POOLING
+
+    parser = argparse.ArgumentParser(prog="scrybe.py rank",
+                                     description="Rank a case's sections for its persona/job, without summaries")
+    parser.add_argument("case", help="case JSON (persona, job_to_be_done, documents)")
+    parser.add_argument("--pdf-dir", help="folder holding the case's PDFs (default: <case dir>/pdfs)")
+    parser.add_argument("--output", help="write the JSON here instead of printing it")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes used to extract outlines in parallel (1 = serial)")
+    parser.add_argument("--cache-dir", default="cache/outlines",
+                        help="on-disk outline cache keyed by PDF content hash ('' disables it)")
+    parser.add_argument("--embeddings-dir", default="cache/embeddings",
+                        help="on-disk section embedding store keyed by PDF hash and model ('' disables it)")
+    parser.add_argument("--embed-backend", default="torch", choices=EMBED_BACKENDS,
+                        help="embedding inference backend (onnx/onnx-int8 need `python run.py --onnx`)")
+    parser.add_argument("--chunk-tokens", type=int, default=256,
+                        help="split sections into chunks of at most this many tokens before embedding (0 = whole sections)")
+    parser.add_argument("--chunk-overlap", type=int, default=32, help="tokens shared by consecutive chunks")
+    parser.add_argument("--chunk-pooling", default="max", choices=POOLING,
+                        help="how chunk similarities are combined into one section score")
+    args = parser.parse_args(argv)
+
+    from main import case_documents, load_input
+    from src.chunking import Chunker
+    from src.models import ModelRegistry
+    from src.pipeline import build_output, extract_and_embed, rank_top_sections
+    from src.vector_store import EmbeddingStore
+
+    input_data = load_input(args.case)
+    persona = input_data["persona"]["role"]
+    job = input_data["job_to_be_done"]["task"]
+    pdf_dir = args.pdf_dir or os.path.join(os.path.dirname(args.case), "pdfs")
+
+    embedder = ModelRegistry(embed_backend=args.embed_backend).embedder
+    chunker = Chunker.for_embedder(embedder, args.chunk_tokens, args.chunk_overlap) if args.chunk_tokens else None
+    store = EmbeddingStore(args.embeddings_dir, embedder.model_id) if args.embeddings_dir else None
+    records, embeddings, failures = extract_and_embed(case_documents(input_data["documents"], pdf_dir), embedder,
+                                                      args.workers, args.cache_dir, store, chunker)
+    if not records:
+        print("[!] No valid sections found.", file=sys.stderr)
+        return 1
+
+    ranked, _ = rank_top_sections(embedder, persona, job, records, embeddings, pooling=args.chunk_pooling,
+                                  top_k=args.top_k)
+    top_sections = [{"document": s["doc"], "page_number": s["page"], "section_title": s["heading"],
+                     "importance_rank": i, "refined_text": None} for i, s in enumerate(ranked, 1)]
+    output = build_output([d["filename"] for d in input_data["documents"]], persona, job, top_sections)
+    del output["subsection_analysis"]
+
+    text = json.dumps(output, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"[✓] Done. Output saved to {args.output}")
+    else:
+        print(text)
+    return 1 if failures else 0
+
+
+def batch(argv):
+    from src.backends import EMBED_BACKENDS, SUMMARY_BACKENDS
+    from src.chunking import POOLING
+    from src.models import SUMMARY_MODES
+
+    parser = argparse.ArgumentParser(prog="scrybe.py batch",
+                                     description="Answer many persona/job pairs over one corpus, extracted and "
+                                                 "embedded once")
+    parser.add_argument("queries", help='JSON with "documents" and "queries": [{id?, persona, job_to_be_done}]')
+    parser.add_argument("--pdf-dir", help="folder holding the PDFs (default: <queries dir>/pdfs)")
+    parser.add_argument("--output-dir", default="output/batch", help="one <id>.json per query is written here")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes used to extract outlines in parallel (1 = serial)")
+    parser.add_argument("--cache-dir", default="cache/outlines",
+                        help="on-disk outline cache keyed by PDF content hash ('' disables it)")
+    parser.add_argument("--embeddings-dir", default="cache/embeddings",
+                        help="on-disk section embedding store keyed by PDF hash and model ('' disables it)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="extract outlines page by page with bounded memory (for very large PDFs)")
+    parser.add_argument("--embed-backend", default="torch", choices=EMBED_BACKENDS,
+                        help="embedding inference backend (onnx/onnx-int8 need `python run.py --onnx`)")
+    parser.add_argument("--summary-backend", default="torch", choices=SUMMARY_BACKENDS,
+                        help="summarization inference backend")
+    parser.add_argument("--summary-mode", default="abstractive", choices=SUMMARY_MODES,
+                        help="abstractive: T5 beam search; extractive: the sentences closest to the query (much faster)")
+    parser.add_argument("--chunk-tokens", type=int, default=256,
+                        help="split sections into chunks of at most this many tokens before embedding (0 = whole sections)")
+    parser.add_argument("--chunk-overlap", type=int, default=32, help="tokens shared by consecutive chunks")
+    parser.add_argument("--chunk-pooling", default="max", choices=POOLING,
+                        help="how chunk similarities are combined into one section score")
+    parser.add_argument("--ann-probe", type=int, default=0,
+                        help="rank through an approximate IVF index scanning this many lists per query "
+                             "(0 = exact search; faster on very large corpora but may miss some top sections)")
+    args = parser.parse_args(argv)
+
+    from main import process_batch
+    from src.models import ModelRegistry
+
+    models = ModelRegistry(embed_backend=args.embed_backend, summary_backend=args.summary_backend,
+                           summary_mode=args.summary_mode)
+    process_batch(args.queries, args.pdf_dir or os.path.join(os.path.dirname(args.queries), "pdfs"),
+                  args.output_dir, workers=args.workers, models=models, cache_dir=args.cache_dir,
+                  embeddings_dir=args.embeddings_dir, streaming=args.streaming, chunk_tokens=args.chunk_tokens,
+                  chunk_overlap=args.chunk_overlap, pooling=args.chunk_pooling, ann_probe=args.ann_probe)
+    return 0
+
+
+COMMANDS = {"outline": outline, "rank": rank, "batch": batch}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    commands = sorted([*COMMANDS, *SCRIPTS])
+    if not argv or argv[0] in ("-h", "--help"):
+        print(__doc__.strip())
+        return 0 if argv else 2
+    command, rest = argv[0], argv[1:]
+    if command in COMMANDS:
+        return COMMANDS[command](rest)
+    if command in SCRIPTS:
+        importlib.import_module(SCRIPTS[command]).main(rest)
+        return 0
+    print(f"[!] Unknown command {command!r}; expected one of {', '.join(commands)}", file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import os
+
+from src import tracing
+from src.backends import EMBED_BACKENDS, SUMMARY_BACKENDS
+from src.chunking import POOLING
+from src.models import SUMMARY_MODES, ModelRegistry
+from src.server import ScrybeServer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve persona/job queries over HTTP with warm models and caches")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes used to extract outlines during ingestion (1 = serial)")
+    parser.add_argument("--threads", type=int, default=2,
+                        help="threads running queries (model calls) concurrently")
+    parser.add_argument("--cache-dir", default="cache/outlines",
+                        help="on-disk outline cache keyed by PDF content hash ('' disables it)")
+    parser.add_argument("--embeddings-dir", default="cache/embeddings",
+                        help="on-disk section embedding store keyed by PDF hash and model ('' disables it)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="extract outlines page by page with bounded memory (for very large PDFs)")
+    parser.add_argument("--no-batching", action="store_true",
+                        help="run every model call on its own instead of coalescing concurrent calls")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="how long a micro-batch waits for more requests before running")
+    parser.add_argument("--embed-batch-size", type=int, default=64)
+    parser.add_argument("--summary-batch-size", type=int, default=8)
+    parser.add_argument("--pdf-dir", action="append", default=[],
+                        help="ingest every PDF in this directory before serving (repeatable)")
+    parser.add_argument("--ingest-root", default=".",
+                        help="POST /ingest may only read PDFs under this directory")
+    parser.add_argument("--embed-backend", default="torch", choices=EMBED_BACKENDS,
+                        help="embedding inference backend (onnx/onnx-int8 need `python run.py --onnx`)")
+    parser.add_argument("--summary-backend", default="torch", choices=SUMMARY_BACKENDS,
+                        help="summarization inference backend")
+    parser.add_argument("--summary-mode", default="abstractive", choices=SUMMARY_MODES,
+                        help="abstractive: T5 beam search; extractive: the sentences closest to the query (much faster)")
+    parser.add_argument("--chunk-tokens", type=int, default=256,
+                        help="split sections into chunks of at most this many tokens before embedding (0 = whole sections)")
+    parser.add_argument("--chunk-overlap", type=int, default=32, help="tokens shared by consecutive chunks")
+    parser.add_argument("--chunk-pooling", default="max", choices=POOLING,
+                        help="how chunk similarities are combined into one section score")
+    parser.add_argument("--ann-probe", type=int, default=0,
+                        help="rank through an approximate IVF index scanning this many lists per query "
+                             "(0 = exact search; faster on very large corpora but may miss some top sections)")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="append per-stage spans and counters to this JSON lines file")
+    parser.add_argument("--debug", action="store_true", help="print debug output (full outlines, section counts)")
+    args = parser.parse_args(argv)
+
+    tracing.configure(args.trace, args.debug)
+    models = ModelRegistry(batching=not args.no_batching, max_wait_ms=args.max_wait_ms,
+                           embed_batch_size=args.embed_batch_size, summary_batch_size=args.summary_batch_size,
+                           embed_backend=args.embed_backend, summary_backend=args.summary_backend,
+                           summary_mode=args.summary_mode)
+    server = ScrybeServer(models.warm_up(), workers=args.workers, cache_dir=args.cache_dir,
+                          embeddings_dir=args.embeddings_dir, streaming=args.streaming, threads=args.threads,
+                          chunk_tokens=args.chunk_tokens, chunk_overlap=args.chunk_overlap, pooling=args.chunk_pooling,
+                          ann_probe=args.ann_probe, ingest_root=args.ingest_root)
+    for pdf_dir in args.pdf_dir:
+        paths = [os.path.join(pdf_dir, f) for f in sorted(os.listdir(pdf_dir)) if f.lower().endswith(".pdf")]
+        result = server.ingest(paths)
+        print(f"[✓] Ingested {len(result['ingested'])} document(s) from {pdf_dir}")
+
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
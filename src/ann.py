@@ -0,0 +1,111 @@
+import numpy as np
+
+from src.ranking import top_k_indices
+
+
+class IVFIndex:
+    """
+    Inverted-file index over L2-normalized section embeddings.
+
+    Vectors are clustered with spherical k-means; a query scans only the
+    n_probe lists whose centroids are closest to it. n_probe is the
+    recall/latency knob: n_probe == n_lists is exact search.
+
+    Results are approximate. On the noisy clustered corpus of
+    benchmarks/bench_ann.py (50k vectors, 224 lists) rank_sections keeps
+    80-88% of the exact top 5 at n_probe 4-32, even after re-scoring 200
+    candidates. Only worth it for corpora far larger than one case, queried
+    many times (serve.py and batch take --ann-probe; exact search is the
+    default everywhere).
+    The index stores list membership only, the vectors stay with the caller
+    (usually a memory-mapped EmbeddingStore matrix).
+    """
+
+    def __init__(self, n_lists=None, n_probe=8, seed=0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.seed = seed
+        self.centroids = None
+        self.ids = None        # vector ids grouped by list
+        self.offsets = None    # list l owns ids[offsets[l]:offsets[l + 1]]
+        self.embeddings = None
+
+    def __len__(self):
+        return 0 if self.ids is None else len(self.ids)
+
+    @staticmethod
+    def _assign(vectors, centroids, chunk_size=16384):
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk_size):
+            block = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+            labels[start:start + chunk_size] = np.argmax(block @ centroids.T, axis=1)
+        return labels
+
+    def build(self, embeddings, n_iter=10, max_train=65536):
+        n = len(embeddings)
+        if n == 0:
+            raise ValueError("Cannot build an index over zero vectors")
+        n_lists = self.n_lists or max(1, int(round(np.sqrt(n))))
+        n_lists = min(n_lists, n)
+        rng = np.random.default_rng(self.seed)
+
+        train_ids = rng.choice(n, size=min(n, max(max_train, n_lists)), replace=False)
+        train = np.asarray(embeddings[np.sort(train_ids)], dtype=np.float32)
+        centroids = train[rng.choice(len(train), size=n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            labels = self._assign(train, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, train)
+            counts = np.bincount(labels, minlength=n_lists)
+            empty = counts == 0
+            # re-seed empty lists from random training points
+            sums[empty] = train[rng.choice(len(train), size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        labels = self._assign(embeddings, centroids)
+        self.centroids = centroids.astype(np.float32)
+        self.ids = np.argsort(labels, kind="stable").astype(np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=n_lists))]).astype(np.int64)
+        self.n_lists = n_lists
+        self.embeddings = embeddings
+        return self
+
+    def candidates(self, query_embedding, n_probe=None):
+        """Ids of every vector in the n_probe lists nearest to the query, ascending."""
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        centroid_sims = self.centroids @ np.asarray(query_embedding, dtype=np.float32)
+        lists = top_k_indices(centroid_sims, n_probe)
+        ids = np.concatenate([self.ids[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+        ids.sort()
+        return ids
+
+    def search(self, query_embedding, k, n_probe=None):
+        """Approximate top-k by inner product: (ids, similarities), best first."""
+        ids = self.candidates(query_embedding, n_probe)
+        sims = np.asarray(self.embeddings[ids], dtype=np.float32) @ np.asarray(query_embedding, dtype=np.float32)
+        best = top_k_indices(sims, k)
+        return ids[best], sims[best]
+
+    def save(self, path):
+        np.savez(
+            path,
+            centroids=self.centroids,
+            ids=self.ids,
+            offsets=self.offsets,
+            params=np.array([self.n_lists, self.n_probe, self.seed], dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path, embeddings):
+        with np.load(path) as data:
+            n_lists, n_probe, seed = (int(v) for v in data["params"])
+            index = cls(n_lists=n_lists, n_probe=n_probe, seed=seed)
+            index.centroids = data["centroids"]
+            index.ids = data["ids"]
+            index.offsets = data["offsets"]
+        if len(index.ids) != len(embeddings):
+            raise ValueError(f"Index covers {len(index.ids)} vectors but {len(embeddings)} embeddings were given")
+        index.embeddings = embeddings
+        return index
@@ -0,0 +1,146 @@
+"""
+Inference backends for the embedding and summary models.
+
+  torch      the saved fp32 checkpoints, run eagerly (default)
+  int8       the same checkpoints with every nn.Linear dynamically quantized
+             to int8 at load time (weights int8, activations quantized per
+             batch); no preparation needed
+  onnx       the embedding transformer exported by `python run.py --onnx`,
+             with onnxruntime's graph optimizations applied once at export
+  onnx-int8  that export with int8 dynamically quantized weights
+
+ONNX covers the embedder only: the summarizer's beam search stays in
+transformers, so it takes torch or int8. onnxruntime is optional and only
+imported when an onnx backend is requested.
+"""
+import json
+import os
+
+import numpy as np
+
+EMBED_BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+SUMMARY_BACKENDS = ("torch", "int8")
+
+ONNX_DIR = "onnx"
+ONNX_MODEL = "model.onnx"
+ONNX_INT8_MODEL = "model_int8.onnx"
+
+
+def quantize_dynamic(model):
+    import torch
+    return torch.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def onnx_model_path(model_path, backend):
+    return os.path.join(model_path, ONNX_DIR, ONNX_INT8_MODEL if backend == "onnx-int8" else ONNX_MODEL)
+
+
+def load_sentence_encoder(model_path, backend="torch", device="cpu"):
+    """Something with SentenceTransformer's encode() for the given backend."""
+    if backend not in EMBED_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {', '.join(EMBED_BACKENDS)}")
+    if backend.startswith("onnx"):
+        return OnnxSentenceEncoder(model_path, onnx_model_path(model_path, backend))
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_path, device=device)
+    if backend == "int8":
+        # quantized Linear layers only run on CPU
+        model = quantize_dynamic(model.to("cpu"))
+    return model
+
+
+class OnnxSentenceEncoder:
+    """
+    Mean-pooled sentence embeddings from an exported transformer, matching
+    what SentenceTransformer.encode returns for all-MiniLM-L6-v2 (Transformer
+    -> mean Pooling -> Normalize).
+    """
+
+    def __init__(self, model_path, onnx_path):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(f"ONNX model not found at {onnx_path}. Run `python run.py --onnx` first.")
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+        self.max_seq_length = 256
+        config_path = os.path.join(model_path, "sentence_bert_config.json")
+        if os.path.exists(config_path):
+            with open(config_path) as f:
+                self.max_seq_length = json.load(f).get("max_seq_length") or self.max_seq_length
+
+        options = ort.SessionOptions()
+        # the graph was optimized at export time; only cheap passes are left to run here
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_BASIC
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = [None] * len(texts)
+
+        # longest first, like SentenceTransformer, so each batch pads to about its own length
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            chunk = order[start:start + batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in chunk], padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np",
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            for i, row in zip(chunk, pooled):
+                embeddings[i] = row
+
+        if single:
+            return embeddings[0]
+        if not embeddings:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack(embeddings).astype(np.float32)
+
+
+def export_onnx(model_path, quantize=True, opset=14):
+    """
+    Exports the embedding transformer under <model_path>/onnx/: model.onnx
+    with onnxruntime's extended graph optimizations (operator fusion, constant
+    folding) baked in, and with quantize=True model_int8.onnx.
+    """
+    import onnxruntime as ort
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(model_path, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    sample = st_model.tokenizer(["export sample text"], return_tensors="pt")
+    # BertModel.forward takes them positionally in this order
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+
+    out_dir = os.path.join(model_path, ONNX_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    raw_path = os.path.join(out_dir, "model_raw.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer, tuple(sample[name] for name in input_names), raw_path,
+            input_names=input_names, output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes, opset_version=opset,
+        )
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    options.optimized_model_filepath = os.path.join(out_dir, ONNX_MODEL)
+    ort.InferenceSession(raw_path, options, providers=["CPUExecutionProvider"])
+
+    if quantize:
+        from onnxruntime.quantization import QuantType
+        from onnxruntime.quantization import quantize_dynamic as ort_quantize_dynamic
+        # quantize the unfused graph; onnxruntime fuses the quantized ops when it loads it
+        ort_quantize_dynamic(raw_path, os.path.join(out_dir, ONNX_INT8_MODEL), weight_type=QuantType.QInt8)
+    os.remove(raw_path)
+    return out_dir
@@ -0,0 +1,178 @@
+"""
+Request coalescing for model calls.
+
+A MicroBatcher owns one worker thread. Callers submit single items and get
+a Future back; the worker waits for the first item, keeps collecting for
+up to max_wait_ms or until max_batch_size items are queued, runs one
+batched call and hands each caller its own result. Under concurrent load
+the model sees a few full batches instead of many forward passes of one.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, fn, max_batch_size=32, max_wait_ms=5.0, name="batcher"):
+        """fn takes a list of items and returns a list of results of the same length, in order."""
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_depth = 0
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        if self._closed:
+            raise RuntimeError(f"{self.name} is closed")
+        future = Future()
+        self._queue.put((item, future))
+        depth = self._queue.qsize()
+        if depth > self._max_depth:
+            self._max_depth = depth
+        return future
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    def map(self, items):
+        """Results for many items; they share batches with whatever else is queued."""
+        futures = [self.submit(item) for item in items]
+        return [f.result() for f in futures]
+
+    def stats(self):
+        with self._lock:
+            batches, items = self._batches, self._items
+        return {
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": items / batches if batches else 0.0,
+            "batch_fill": items / (batches * self.max_batch_size) if batches else 0.0,
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self._max_depth,
+        }
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                self._queue.put(None)  # let _run see the shutdown after this batch
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            items = [item for item, _ in batch]
+            try:
+                results = self.fn(items)
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name}: batch of {len(batch)} items returned {len(results)} results")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+
+
+class BatchedEmbedder:
+    """
+    Embedder whose queries and section texts are encoded through micro-batches.
+    Queries have a batcher of their own, so an interactive query never waits
+    behind the section batches a large ingest has queued.
+    """
+
+    def __init__(self, embedder, max_batch_size=64, max_wait_ms=5.0):
+        self.embedder = embedder
+        self.query_batcher = MicroBatcher(self._encode, max_batch_size, max_wait_ms, name="embed.query")
+        self.batcher = MicroBatcher(self._encode, max_batch_size, max_wait_ms, name="embed")
+
+    def __getattr__(self, name):
+        return getattr(self.embedder, name)
+
+    def _encode(self, texts):
+        return list(self.embedder.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True))
+
+    def embed_query(self, persona, job):
+        return self.query_batcher(f"{persona}. {job}")
+
+    def embed_queries(self, pairs):
+        return np.stack(self.query_batcher.map([f"{persona}. {job}" for persona, job in pairs]))
+
+    def embed_sections(self, sections):
+        if not sections:
+            return self.embedder.embed_sections(sections)
+        return np.stack(self.batcher.map(sections))
+
+    def stats(self):
+        return {"queries": self.query_batcher.stats(), "sections": self.batcher.stats()}
+
+    def close(self):
+        self.query_batcher.close()
+        self.batcher.close()
+
+
+class BatchedSummarizer:
+    """Summarizer whose texts from every caller share summarize_batch calls."""
+
+    def __init__(self, summarizer, max_batch_size=8, max_wait_ms=20.0):
+        self.summarizer = summarizer
+        self.batcher = MicroBatcher(self._summarize, max_batch_size, max_wait_ms, name="summarize")
+
+    def __getattr__(self, name):
+        return getattr(self.summarizer, name)
+
+    def _summarize(self, items):
+        # items are (text, max_length, min_length); generate() takes one setting per call
+        results = [None] * len(items)
+        groups = {}
+        for i, (_, max_length, min_length) in enumerate(items):
+            groups.setdefault((max_length, min_length), []).append(i)
+        for (max_length, min_length), positions in groups.items():
+            summaries = self.summarizer.summarize_batch(
+                [items[i][0] for i in positions], max_length=max_length, min_length=min_length,
+                batch_size=self.batcher.max_batch_size,
+            )
+            for i, summary in zip(positions, summaries):
+                results[i] = summary
+        return results
+
+    def summarize(self, text, max_length=120, min_length=30, query_embedding=None):
+        return self.batcher((text, max_length, min_length))
+
+    def summarize_batch(self, texts, max_length=120, min_length=30, batch_size=None, query_embedding=None):
+        return self.batcher.map([(text, max_length, min_length) for text in texts])
+
+    def stats(self):
+        return self.batcher.stats()
+
+    def close(self):
+        self.batcher.close()
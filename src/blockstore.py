@@ -0,0 +1,110 @@
+import numpy as np
+
+
+class BlockStore:
+    """
+    Column-oriented storage for text lines.
+
+    Geometry, font size, page and id live in NumPy arrays; font names are
+    interned into ``fonts`` and referenced by ``font_id``; all texts are kept
+    in one string addressed through an offset table. Row ``i`` is the same
+    line a block dict ({"id", "text", "font_size", "font_name", "page", "x0",
+    "x1", "y0", "y1"}) used to describe.
+    """
+
+    __slots__ = ("ids", "font_size", "font_id", "fonts", "page", "x0", "x1", "y0", "y1", "_text", "_offsets")
+
+    def __init__(self, texts, ids, font_size, font_id, fonts, page, x0, x1, y0, y1):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.font_size = np.asarray(font_size, dtype=np.float64)
+        self.font_id = np.asarray(font_id, dtype=np.int32)
+        self.fonts = fonts
+        self.page = np.asarray(page, dtype=np.int32)
+        self.x0 = np.asarray(x0, dtype=np.float64)
+        self.x1 = np.asarray(x1, dtype=np.float64)
+        self.y0 = np.asarray(y0, dtype=np.float64)
+        self.y1 = np.asarray(y1, dtype=np.float64)
+        self._text = "".join(texts)
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        self._offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+
+    @classmethod
+    def from_blocks(cls, blocks):
+        builder = BlockStoreBuilder()
+        for b in blocks:
+            builder.add(b["text"], b["font_size"], b["font_name"], b["page"], b["x0"], b["x1"], b["y0"], b["y1"], b.get("id"))
+        return builder.build()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def text(self, i):
+        return self._text[self._offsets[i]:self._offsets[i + 1]]
+
+    def texts(self):
+        text, offsets = self._text, self._offsets.tolist()
+        return [text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+    def font_name(self, i):
+        return self.fonts[self.font_id[i]]
+
+    def take(self, index):
+        """New store holding the selected rows (boolean mask or integer positions)."""
+        index = np.flatnonzero(index) if np.asarray(index).dtype == bool else np.asarray(index, dtype=np.intp)
+        texts = self.texts()
+        return BlockStore(
+            [texts[i] for i in index.tolist()],
+            self.ids[index], self.font_size[index], self.font_id[index], self.fonts,
+            self.page[index], self.x0[index], self.x1[index], self.y0[index], self.y1[index],
+        )
+
+    def with_texts(self, texts):
+        return BlockStore(texts, self.ids, self.font_size, self.font_id, self.fonts,
+                          self.page, self.x0, self.x1, self.y0, self.y1)
+
+    def row(self, i):
+        return {
+            "id": int(self.ids[i]),
+            "text": self.text(i),
+            "font_size": float(self.font_size[i]),
+            "font_name": self.font_name(i),
+            "page": int(self.page[i]),
+            "x0": float(self.x0[i]),
+            "x1": float(self.x1[i]),
+            "y0": float(self.y0[i]),
+            "y1": float(self.y1[i]),
+        }
+
+    def rows(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+
+class BlockStoreBuilder:
+    """Appends lines one at a time (as they come out of PyMuPDF) and freezes them into a BlockStore."""
+
+    def __init__(self, start_id=0):
+        self.next_id = start_id
+        self.fonts = []
+        self._font_ids = {}
+        self.texts = []
+        self.columns = tuple([] for _ in range(8))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, text, font_size, font_name, page, x0, x1, y0, y1, block_id=None):
+        font_id = self._font_ids.get(font_name)
+        if font_id is None:
+            font_id = self._font_ids[font_name] = len(self.fonts)
+            self.fonts.append(font_name)
+        if block_id is None:
+            block_id = self.next_id
+        self.next_id = block_id + 1
+        self.texts.append(text)
+        for column, value in zip(self.columns, (block_id, font_size, font_id, page, x0, x1, y0, y1)):
+            column.append(value)
+
+    def build(self):
+        ids, font_size, font_id, page, x0, x1, y0, y1 = self.columns
+        return BlockStore(self.texts, ids, font_size, font_id, self.fonts, page, x0, x1, y0, y1)
@@ -0,0 +1,253 @@
+"""
+Fault-isolated bulk outline extraction.
+
+Each worker is its own spawned process fed one file at a time over a pipe,
+so the parent can enforce a per-file timeout by killing the worker that
+holds a stuck file (a ProcessPoolExecutor cannot cancel a running task),
+and can retire workers after max_tasks_per_worker files to cap memory
+growth. Failed files are retried up to `retries` times (timeouts only with
+retry_timeouts, since a pathological PDF usually stalls again) and then
+skipped. Workers write each outline JSON atomically as soon as it is done
+and report back only status and timing (plus the section records, when the
+caller streams them), so nothing kept per file grows with the outlines.
+A file's clock starts once its worker has finished starting up.
+"""
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+import numpy as np
+
+from src.cache import OutlineCache, atomic_write_bytes, file_hash
+from src.extract import extract_outline
+from src.sections import outline_records
+from src.streaming import extract_outline_streaming
+
+
+def output_name(filename):
+    return filename.replace(".pdf", ".json")
+
+
+def _work(conn, cache_dir, streaming, output_dir):
+    cache = OutlineCache(cache_dir) if cache_dir else None
+    conn.send("ready")  # imports are done; the parent starts timing tasks from here
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        path, name, pdf_hash, want_records = task
+        start = time.perf_counter()
+        try:
+            pdf_hash = pdf_hash or file_hash(path)
+            if cache is not None:
+                outline = cache.get_or_extract(path, pdf_hash=pdf_hash, streaming=streaming)
+            else:
+                outline = extract_outline_streaming(path) if streaming else extract_outline(path)
+            if output_dir:
+                data = json.dumps(outline, indent=2, ensure_ascii=False).encode("utf-8")
+                atomic_write_bytes(os.path.join(output_dir, output_name(name)), data)
+            records = outline_records(outline, name, pdf_hash)
+            conn.send(("ok", time.perf_counter() - start, len(records), records if want_records else None, None))
+        except Exception as e:
+            conn.send(("error", time.perf_counter() - start, 0, None, str(e)))
+
+
+class _Worker:
+    def __init__(self, context, args):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_work, args=(child, *args), daemon=True)
+        self.process.start()
+        child.close()
+        self.ready = False
+        self.task = None
+        self.started = None  # set when the task is handed to a ready worker
+        self.done = 0
+
+    def start(self, task, want_records):
+        self.task = task
+        self.want_records = want_records
+        if self.ready:
+            self._send()
+
+    def set_ready(self):
+        self.ready = True
+        if self.task is not None:
+            self._send()
+
+    def _send(self):
+        self.started = time.perf_counter()
+        self.conn.send((*self.task[1:4], self.want_records))
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class BulkRunner:
+    """
+    Extracts outlines for many PDFs in `workers` processes. run(documents)
+    yields one result per file as it finishes:
+      {"index", "document", "status": "ok" | "error" | "timeout", "seconds", "attempts", "error", "sections"}
+    plus "records" when run(..., records=True). Results are kept in
+    self.results for report(), without their records.
+    """
+
+    def __init__(self, workers=None, timeout=120.0, max_tasks_per_worker=50, retries=1, retry_timeouts=False,
+                 cache_dir=None, streaming=False, output_dir=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.timeout = timeout
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.retries = retries
+        self.retry_timeouts = retry_timeouts
+        self.output_dir = output_dir
+        self.worker_args = (cache_dir, streaming, output_dir)
+        self.results = []
+        self.recycled = 0
+        self.killed = 0
+        self.seconds = 0.0
+
+    def run(self, documents, hashes=None, records=False):
+        """
+        documents: list of (filepath, filename); hashes: optional content hash
+        per document. With records, each ok result carries its section records.
+        """
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+        # spawn keeps workers free of whatever model threads the parent has started
+        context = multiprocessing.get_context("spawn")
+        pending = deque((idx, path, name, hashes[idx] if hashes else None, 1)
+                        for idx, (path, name) in enumerate(documents))
+        idle, busy = [], {}
+        start = time.perf_counter()
+        try:
+            while pending or busy:
+                while pending and (idle or len(idle) + len(busy) < self.workers):
+                    worker = idle.pop() if idle else _Worker(context, self.worker_args)
+                    worker.start(pending.popleft(), records)
+                    busy[worker.conn] = worker
+
+                wait_for = None
+                started = [worker.started for worker in busy.values() if worker.started is not None]
+                if self.timeout and started:
+                    wait_for = max(0.0, min(started) + self.timeout - time.perf_counter())
+                for conn in wait(list(busy), wait_for):
+                    worker = busy[conn]
+                    try:
+                        message = conn.recv()
+                    except (EOFError, OSError):
+                        # the worker died (e.g. a crash inside MuPDF); a new one takes its place
+                        del busy[conn]
+                        worker.kill()
+                        status, sections, file_records = "error", 0, None
+                        seconds = time.perf_counter() - worker.started if worker.started is not None else 0.0
+                        error = f"worker exited with code {worker.process.exitcode}"
+                    else:
+                        if message == "ready":
+                            worker.set_ready()
+                            continue
+                        del busy[conn]
+                        status, seconds, sections, file_records, error = message
+                        worker.done += 1
+                        if self.max_tasks_per_worker and worker.done >= self.max_tasks_per_worker:
+                            worker.stop()
+                            self.recycled += 1
+                        else:
+                            idle.append(worker)
+                    result = self._finish(worker.task, status, seconds, sections, file_records, error, pending)
+                    if result is not None:
+                        yield result
+
+                now = time.perf_counter()
+                for conn, worker in list(busy.items()):
+                    if self.timeout and worker.started is not None and now - worker.started >= self.timeout:
+                        del busy[conn]
+                        worker.kill()
+                        self.killed += 1
+                        result = self._finish(worker.task, "timeout", now - worker.started, 0, None,
+                                              f"timed out after {self.timeout:g}s", pending)
+                        if result is not None:
+                            yield result
+        finally:
+            for worker in idle:
+                worker.stop()
+            for worker in busy.values():
+                worker.kill()
+            self.seconds += time.perf_counter() - start
+
+    def _finish(self, task, status, seconds, sections, records, error, pending):
+        """The file's result, or None when it goes back in the queue for another attempt."""
+        idx, path, name, pdf_hash, attempt = task
+        retry = status == "error" or (status == "timeout" and self.retry_timeouts)
+        if retry and attempt <= self.retries:
+            pending.append((idx, path, name, pdf_hash, attempt + 1))
+            return None
+        result = {"index": idx, "document": name, "status": status, "seconds": round(seconds, 4),
+                  "attempts": attempt, "error": error, "sections": sections}
+        self.results.append(result)
+        if records is not None:
+            return {**result, "records": records}
+        return result
+
+    def iter_sections(self, documents, hashes=None):
+        """run() shaped like iter_document_sections: yields (index, records, error)."""
+        for result in self.run(documents, hashes, records=True):
+            error = RuntimeError(result["error"]) if result["status"] != "ok" else None
+            yield result["index"], result.get("records") or [], error
+
+    def report(self, slowest=10):
+        """Counts, timing percentiles and per-file timings of every file run so far."""
+        seconds = np.array([r["seconds"] for r in self.results]) if self.results else np.zeros(1)
+        counts = {status: sum(r["status"] == status for r in self.results) for status in ("ok", "error", "timeout")}
+        by_time = sorted(self.results, key=lambda r: -r["seconds"])
+        return {
+            "files": len(self.results),
+            **counts,
+            "retried": sum(r["attempts"] > 1 for r in self.results),
+            "workers_recycled": self.recycled,
+            "workers_killed": self.killed,
+            "wall_s": round(self.seconds, 3),
+            "files_per_s": round(len(self.results) / self.seconds, 2) if self.seconds else None,
+            "p50_s": round(float(np.percentile(seconds, 50)), 4),
+            "p95_s": round(float(np.percentile(seconds, 95)), 4),
+            "max_s": round(float(seconds.max()), 4),
+            "slowest": [{"document": r["document"], "seconds": r["seconds"], "status": r["status"]}
+                        for r in by_time[:slowest]],
+            "failures": [{"document": r["document"], "status": r["status"], "attempts": r["attempts"],
+                          "error": r["error"]} for r in self.results if r["status"] != "ok"],
+            "timings": [{"document": r["document"], "seconds": r["seconds"], "status": r["status"],
+                         "attempts": r["attempts"]} for r in self.results],
+        }
+
+
+def print_report(report):
+    if not report["files"]:
+        print("[✓] Nothing to extract")
+        return
+    print(f"[✓] {report['ok']}/{report['files']} files in {report['wall_s']:.1f}s "
+          f"({report['files_per_s']} files/s): {report['error']} failed, {report['timeout']} timed out, "
+          f"{report['retried']} retried, {report['workers_recycled']} workers recycled, "
+          f"{report['workers_killed']} killed")
+    print(f"    per file: p50 {report['p50_s']:.3f}s  p95 {report['p95_s']:.3f}s  max {report['max_s']:.3f}s")
+    if report["slowest"]:
+        print("    slowest:")
+        for r in report["slowest"]:
+            print(f"      {r['seconds']:>9.3f}s  {r['status']:<7}  {r['document']}")
+    for failure in report["failures"]:
+        print(f"❌ Error processing {failure['document']} ({failure['status']}, "
+              f"{failure['attempts']} attempt(s)): {failure['error']}")
@@ -0,0 +1,119 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+from src import tracing
+from src.extract import EXTRACTOR_VERSION, extract_outline
+from src.streaming import extract_outline_streaming
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def atomic_write_bytes(path, data):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class OutlineCache:
+    """
+    Stores extract_outline results (outline + section_text) as gzipped JSON,
+    keyed by PDF content hash and EXTRACTOR_VERSION. Least recently used
+    entries are evicted once the directory grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir="cache/outlines", max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._size = None
+
+    def _path(self, pdf_hash, streaming=False):
+        mode = "s" if streaming else ""
+        key = f"v{EXTRACTOR_VERSION}{mode}-{pdf_hash}"
+        return os.path.join(self.cache_dir, pdf_hash[:2], key + ".json.gz")
+
+    def get(self, pdf_hash, streaming=False):
+        path = self._path(pdf_hash, streaming)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                outline = json.load(f)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        os.utime(path)  # mtime doubles as the LRU clock
+        return outline
+
+    def put(self, pdf_hash, outline, streaming=False):
+        payload = json.dumps(outline, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        data = gzip.compress(payload, compresslevel=6)
+        atomic_write_bytes(self._path(pdf_hash, streaming), data)
+
+        # Size is only tracked once evict() has scanned the directory; short-lived
+        # instances (one per worker task) leave eviction to their owner.
+        if self._size is not None:
+            self._size += len(data)
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def get_or_extract(self, pdf_path, pdf_hash=None, streaming=False):
+        pdf_hash = pdf_hash or file_hash(pdf_path)
+        outline = self.get(pdf_hash, streaming)
+        tracing.count("outline_cache.hits" if outline is not None else "outline_cache.misses")
+        if outline is None:
+            outline = extract_outline_streaming(pdf_path) if streaming else extract_outline(pdf_path)
+            self.put(pdf_hash, outline, streaming)
+        return outline
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json.gz"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+    def delete(self, pdf_hash):
+        """Drops both extraction modes' entries for this PDF."""
+        for streaming in (False, True):
+            try:
+                os.remove(self._path(pdf_hash, streaming))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        for _, _, path in self._entries():
+            os.remove(path)
+        self._size = 0
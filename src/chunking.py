@@ -0,0 +1,118 @@
+"""
+Token-bounded, overlapping chunks of section text.
+
+The MiniLM encoder only reads its first max_seq_length tokens, so a long
+section used to be ranked by its opening paragraph alone. Sections are
+split into windows that fit the encoder, every chunk is embedded, and
+chunk similarities are pooled back to one score per section (max or mean).
+"""
+import numpy as np
+
+from src import tracing
+
+POOLING = ("max", "mean")
+
+# fallback when no fast tokenizer is available: about 0.75 words per token
+WORDS_PER_TOKEN = 0.75
+
+
+class Chunker:
+    """
+    Splits text into chunks of at most max_tokens tokens (special tokens and
+    `reserve` tokens for the document name appended before embedding are
+    kept free), consecutive chunks sharing `overlap` tokens. Text that fits
+    comes back unchanged as a single chunk.
+    """
+
+    def __init__(self, tokenizer=None, max_tokens=256, overlap=32, reserve=16):
+        self.tokenizer = tokenizer if getattr(tokenizer, "is_fast", False) else None
+        self.window = max(8, max_tokens - 2 - reserve)
+        self.overlap = min(overlap, self.window // 2)
+
+    @classmethod
+    def for_embedder(cls, embedder, max_tokens=256, overlap=32):
+        model = embedder.model
+        limit = getattr(model, "max_seq_length", None) or max_tokens
+        return cls(getattr(model, "tokenizer", None), min(max_tokens, limit), overlap)
+
+    @staticmethod
+    def _spans(n, window, overlap):
+        start = 0
+        while True:
+            end = min(start + window, n)
+            yield start, end
+            if end == n:
+                return
+            start = end - overlap
+
+    def split(self, text):
+        if self.tokenizer is None:
+            words = text.split()
+            window = int(self.window * WORDS_PER_TOKEN)
+            if len(words) <= window:
+                return [text]
+            overlap = int(self.overlap * WORDS_PER_TOKEN)
+            return [" ".join(words[start:end]) for start, end in self._spans(len(words), window, overlap)]
+
+        offsets = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True,
+                                 verbose=False)["offset_mapping"]
+        tracing.count("tokens", len(offsets))
+        if len(offsets) <= self.window:
+            return [text]
+        spans = self._spans(len(offsets), self.window, self.overlap)
+        return [text[offsets[start][0]:offsets[end - 1][1]].strip() for start, end in spans]
+
+
+def chunk_records(records, chunker):
+    """Sets record["chunks"] on every record; returns the chunk texts in record order."""
+    chunks = []
+    for record in records:
+        record["chunks"] = chunker.split(record["text"])
+        chunks.extend(record["chunks"])
+    return chunks
+
+
+def chunk_owners(records):
+    """Section index of every embedding row, or None when the records were not chunked."""
+    if not records or "chunks" not in records[0]:
+        return None
+    return np.repeat(np.arange(len(records)), [len(r["chunks"]) for r in records])
+
+
+def embed_sorted(embed_fn, texts):
+    """embed_fn(texts) with texts sent longest first so each batch pads to about its own length."""
+    if not texts:
+        return embed_fn(texts)
+    order = np.argsort([-len(t) for t in texts], kind="stable")
+    embedded = np.asarray(embed_fn([texts[i] for i in order.tolist()]))
+    result = np.empty_like(embedded)
+    result[order] = embedded
+    return result
+
+
+def pool_scores(scores, owners, n_sections, pooling="max"):
+    """One score per section from per-chunk scores; a queries × chunks matrix is pooled row by row."""
+    scores = np.asarray(scores)
+    if scores.ndim == 2:
+        return _pool_rows(scores, owners, n_sections, pooling)
+    if pooling == "max":
+        pooled = np.full(n_sections, -np.inf, dtype=np.float64)
+        np.maximum.at(pooled, owners, scores)
+        return pooled
+    if pooling == "mean":
+        totals = np.bincount(owners, weights=scores, minlength=n_sections)
+        return totals / np.maximum(np.bincount(owners, minlength=n_sections), 1)
+    raise ValueError(f"Unknown pooling {pooling!r}; expected one of {', '.join(POOLING)}")
+
+
+def _pool_rows(scores, owners, n_sections, pooling):
+    # ufunc.at over the transposed views pools every query's row in one call
+    if pooling == "max":
+        pooled = np.full((len(scores), n_sections), -np.inf, dtype=np.float64)
+        np.maximum.at(pooled.T, owners, scores.T)
+        return pooled
+    if pooling == "mean":
+        totals = np.zeros((len(scores), n_sections), dtype=np.float64)
+        np.add.at(totals.T, owners, scores.T)
+        return totals / np.maximum(np.bincount(owners, minlength=n_sections), 1)
+    raise ValueError(f"Unknown pooling {pooling!r}; expected one of {', '.join(POOLING)}")
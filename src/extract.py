@@ -1,122 +1,176 @@
-import fitz  
 import statistics
-from collections import Counter
 import re
-from collections import defaultdict
+from collections import namedtuple
+from functools import lru_cache
 
-def normalize_font_name(font_name):
-    return font_name.split(",")[0].strip()
-
-def group_blocks_into_rows(blocks, y_tolerance=2):
-    rows = defaultdict(list)
-    for block in blocks:
-        y_key = round(block["y0"] / y_tolerance) * y_tolerance
-        rows[y_key].append(block)
-    return list(rows.values())
-
-def detect_table_like_groups(rows, x_tolerance=5):
-    column_patterns = defaultdict(list)
+import numpy as np
 
-    for row in rows:
-        x_positions = sorted([round((b["x0"] + b["x1"]) / 2) for b in row])
-        key = tuple([round(x / x_tolerance) * x_tolerance for x in x_positions])
-        if len(key) > 1:
-            column_patterns[key].append(row)
+from src import tracing
+from src.blockstore import BlockStore, BlockStoreBuilder
+from src.pdfdoc import open_document
 
-    tables = [rows for key, rows in column_patterns.items() if len(rows) >= 3]
-    return tables
+# Bump whenever a change to this module can alter extract_outline output;
+# cached outlines are keyed on it.
+EXTRACTOR_VERSION = 5
 
-def flatten_table_blocks(tables):
-    return [block for table in tables for row in table for block in row]
+def normalize_font_name(font_name):
+    return font_name.split(",")[0].strip()
 
+def detect_table_regions(store, y_tolerance=2, x_tolerance=5, min_rows=3):
+    """
+    Boolean mask over blocks that sit in table-like regions.
+
+    On each page, line centres are clustered into columns (a gap wider than
+    x_tolerance starts a new column) and lines are grouped into rows by
+    rounded y0. A table is a run of at least min_rows consecutive rows in
+    which every row shares two or more columns with the next one, so rows
+    with a missing or extra cell still belong to their table.
+    """
+    n = len(store)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    page = store.page.astype(np.int64)
+
+    # columns: sort centres within each page and split on gaps
+    centres = (store.x0 + store.x1) / 2
+    order = np.lexsort((centres, page))
+    sorted_centres, sorted_pages = centres[order], page[order]
+    new_column = np.ones(n, dtype=bool)
+    new_column[1:] = (sorted_pages[1:] != sorted_pages[:-1]) | (np.diff(sorted_centres) > x_tolerance)
+    column = np.empty(n, dtype=np.int64)
+    column[order] = np.cumsum(new_column) - 1
+    n_columns = int(column.max()) + 1
+
+    # rows: (page, rounded y0), numbered top to bottom through the document
+    y_keys = np.round(store.y0 / y_tolerance).astype(np.int64)
+    y_keys -= y_keys.min()
+    _, row = np.unique(page * (int(y_keys.max()) + 1) + y_keys, return_inverse=True)
+    row = row.reshape(-1)
+    n_rows = int(row.max()) + 1
+
+    # distinct (row, column) cells; a cell whose column is also used by the
+    # next row links the two rows (column ids never span pages)
+    cells = np.unique(row * n_columns + column)
+    shared = np.isin(cells + n_columns, cells)
+    links = np.bincount(cells[shared] // n_columns, minlength=n_rows)[:-1] >= 2
+
+    # rows covered by runs of at least min_rows - 1 consecutive links
+    edges = np.diff(np.concatenate([[0], links.astype(np.int8), [0]]))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    long_runs = ends - starts + 1 >= min_rows
+    coverage = np.zeros(n_rows + 1, dtype=np.int64)
+    np.add.at(coverage, starts[long_runs], 1)
+    np.add.at(coverage, ends[long_runs] + 1, -1)
+    table_rows = np.cumsum(coverage)[:n_rows] > 0
+    return table_rows[row]
+
+
+
+NON_WORD = re.compile(r'[^\w\s]')
+WHITESPACE_RUN = re.compile(r'\s+')
+
+DOTS_ONLY = re.compile(r"[.\-•*·\s]+")
+BULLET_GLYPHS = re.compile(r"\s*[•·▪◦‣●○■*\-][•·▪◦‣●○■*\-\s]*")
+ENDS_IN_DIGIT = re.compile(r"\d+$")
+
+DECORATIVE_KEYWORDS = ("copyright", "issued", "published", "approved", "confidential")
+DECORATIVE = re.compile(rf"\b(?:{'|'.join(DECORATIVE_KEYWORDS)})\b")
+
+# Heading text rules, compiled once. A text is a heading candidate only if no
+# rejection below holds; each test gets the stripped text and its lowercase.
+REJECTED_ANYWHERE = re.compile(
+    r"\b\d+\s*$"            # ends in a number (page numbers, list items)
+    r"|\s{2,}"               # gaps between words
+    r"|[•\-*·•◦‣∙⦁]"          # bullets and dashes
+    r"|/\s"                  # "and/ or", broken paths
+)
+STARTS_UPPER_OR_DIGIT = re.compile(r"[A-Z0-9]")
+WORD = re.compile(r"\b\w+(?:'\w+)?\b")
+ALLOWED_SHORT_WORDS = frozenset({"to", "of", "in", "on", "by", "at", "up", "an", "as", "or", "if", "is", "be", "a",
+                                 "it", ",", "ll", "re", "s"})
+DISALLOWED_HEADING_KEYWORDS = ("version", "remarks", "confidential", "appendix", "draft", "please")
+
+
+def has_bad_short_word(lower):
+    return any(len(word) <= 2 and word not in ALLOWED_SHORT_WORDS and not word.isdigit()
+               for word in WORD.findall(lower))
+
+
+HEADING_TEXT_REJECTS = (
+    lambda text, lower: text.endswith("."),
+    lambda text, lower: '"' in text,
+    lambda text, lower: ":" in text and not text.endswith(":"),
+    lambda text, lower: not STARTS_UPPER_OR_DIGIT.match(text),
+    lambda text, lower: any(keyword in lower for keyword in DISALLOWED_HEADING_KEYWORDS),
+    lambda text, lower: REJECTED_ANYWHERE.search(text) is not None,
+    lambda text, lower: has_bad_short_word(lower),
+)
 
 
 def normalize(text):
-    return re.sub(r'[^\w\s]', '', text.lower()).strip()
+    return NON_WORD.sub('', text.lower()).strip()
 
 def is_duplicate_title(heading_text, title_text):
     return normalize(heading_text) == normalize(title_text)
 
 def is_decorative_text(text):
-    disallowed_keywords = [
-        "copyright", "issued", "published", "approved", "confidential"
-    ]
-    lower_text = text.lower()
-    for keyword in disallowed_keywords:
-        if re.search(rf"\b{re.escape(keyword)}\b", lower_text):
-            return True
-    return False
-
-def has_good_follower(i, blocks, body_font):
-    for j in range(i + 1, min(i + 3, len(blocks))):
-        follower = blocks[j]
-        fsize = follower["font_size"]
-        ftext = follower["text"].strip()
-        fwords = ftext.split()
-
-        if is_decorative_text(ftext):
-            return False
-
-        if fsize >= body_font and len(fwords) < 10:
-            return True
-        if fsize >= body_font and len(fwords) >= 10:
-            return True
-
-    return False
+    return text_features(text).decorative
+
+def heading_text_ok(text):
+    """Text-only checks of determine_heading_level; text is already stripped."""
+    return text_features(text).heading_text
+
+# Everything the heading rules read from a block's text.
+TextFeatures = namedtuple("TextFeatures", "words decorative heading_text bullets_only")
+
+@lru_cache(maxsize=65536)
+def text_features(text):
+    """TextFeatures of one block's text; headers, footers and running titles repeat on every page."""
+    stripped = text.strip()
+    lower = stripped.lower()
+    # the keyword scan is far cheaper than the word-boundary regex and rules out nearly every line
+    decorative = any(keyword in lower for keyword in DECORATIVE_KEYWORDS) and DECORATIVE.search(lower) is not None
+    heading_text = not any(rejects(stripped, lower) for rejects in HEADING_TEXT_REJECTS)
+    return TextFeatures(len(stripped.split()), decorative, heading_text, BULLET_GLYPHS.fullmatch(text) is not None)
+
+def block_features(texts):
+    """text_features of every text, as one array per field."""
+    rows = [text_features(t) for t in texts]
+    return {
+        name: np.fromiter((row[k] for row in rows), dtype=np.int64 if name == "words" else bool, count=len(rows))
+        for k, name in enumerate(TextFeatures._fields)
+    }
+
+# Layout rules by level, the first that holds wins; all of them need a short
+# block of at least body size.
+HEADING_LAYOUT_RULES = (
+    ("H1", lambda above, below: above > 150),
+    ("H2", lambda above, below: (above >= 10) & (below >= 5)),
+    ("H3", lambda above, below: (above >= 10) & (below > 15)),
+)
+
+def layout_level(size, body_font, is_short, spacing_above, spacing_below):
+    if size >= body_font and is_short:
+        for level, rule in HEADING_LAYOUT_RULES:
+            if rule(spacing_above, spacing_below):
+                return level
+    return None
 
 def determine_heading_level(i, blocks, body_font, h1_font, h2_font):
+    """Level of blocks[i] (a list of block dicts); heading_levels computes the same for a whole BlockStore."""
     current = blocks[i]
-    text = current["text"].strip()
+    features = text_features(current["text"])
     size = current["font_size"]
 
-    if re.search(r"\b\d+\s*$", text):
-       return None
-    
-    if re.search(r"\s{2,}", text):
-        return None
-
-    if re.search(r"[•\-*·•◦‣∙⦁]", text):
-     return None
-    
-    if not re.match(r"^[A-Z0-9]", text):
-        return None
-    
     next = blocks[i + 1] if i + 1 < len(blocks) else None
     if next and current["page"] == next["page"]:
         same_line_threshold = 3.0  # px
         if abs(current["y0"] - next["y0"]) <= same_line_threshold:
             return None
 
-    allowed_short_words = {"to", "of", "in", "on", "by", "at", "up", "an", "as", "or", "if", "is", "be", "a","it",",","ll","re","s"}
-    words = re.findall(r"\b\w+(?:'\w+)?\b", text.lower())
-    for word in words:
-        if len(word) <= 2 and word not in allowed_short_words and not word.isdigit():
-            return None
-
-    disallowed_keywords = {"version", "remarks", "confidential", "appendix", "draft","please"}
-    lower_text = text.lower()
-    if any(kw in lower_text for kw in disallowed_keywords):
-        return None
-
-    if re.search(r"/\s", text):
-        return None
-
-    if '"' in text:
-        return None
-
-    if ":" in text and not text.strip().endswith(":"):
-        return None
-    
-    if text.strip().endswith("."):
-        return None
-
-    is_bold = "bold" in current["font_name"].lower()
-    is_all_caps = text.isupper() and len(text.split()) <= 6
-    is_short = len(text.split()) <= 15
-    y0 = current["y0"]
+    is_short = features.words <= 15
 
     prev = blocks[i - 1] if i > 0 else None
-    next = blocks[i + 1] if i + 1 < len(blocks) else None
     spacing_above = (
         current["y0"] - prev["y1"]
         if prev and current["page"] == prev["page"]
@@ -128,115 +182,171 @@ def determine_heading_level(i, blocks, body_font, h1_font, h2_font):
         else 0
     )
 
-    
-    if size >= body_font and is_short and spacing_above > 150:
-        return "H1"
-
-    if size >= body_font and spacing_above>=10 and spacing_below>=5 and is_short:
-        return "H2"
-
-    if  size>=body_font and is_short and spacing_above >=10 and spacing_below > 15:
-        return "H3"
-
-    return None
-
-
-def extract_outline(pdf_path):
-    doc = fitz.open(pdf_path)
-    blocks = []
-
-    for page_num, page in enumerate(doc, start=1):
-        for block in page.get_text("dict")["blocks"]:
-            if "lines" not in block:
-                continue
-            for line in block["lines"]:
-                text = ""
-                font_sizes = []
-                font_names = []
+    level = layout_level(size, body_font, is_short, spacing_above, spacing_below)
+    if level is None or not features.heading_text:
+        return None
+    return level
+
+def vertical_spacing(store):
+    """(spacing_above, spacing_below, same_line_as_next) for every block; 0 across page breaks."""
+    n = len(store)
+    same_page_next = np.zeros(n, dtype=bool)
+    same_page_next[:-1] = store.page[:-1] == store.page[1:]
+    spacing_above = np.zeros(n)
+    spacing_above[1:] = np.where(same_page_next[:-1], store.y0[1:] - store.y1[:-1], 0)
+    spacing_below = np.zeros(n)
+    spacing_below[:-1] = np.where(same_page_next[:-1], store.y0[1:] - store.y1[:-1], 0)
+    same_line = np.zeros(n, dtype=bool)
+    same_line[:-1] = same_page_next[:-1] & (np.abs(store.y0[:-1] - store.y0[1:]) <= 3.0)
+    return spacing_above, spacing_below, same_line
+
+def heading_levels(store, features, body_font, h1_font, h2_font):
+    """determine_heading_level for every block of a BlockStore, from its block_features."""
+    spacing_above, spacing_below, same_line = vertical_spacing(store)
+    eligible = (
+        (store.font_size >= body_font) & (features["words"] <= 15) & features["heading_text"] & ~same_line
+    )
+    levels = np.full(len(store), None, dtype=object)
+    undecided = eligible
+    for level, rule in HEADING_LAYOUT_RULES:
+        hit = undecided & rule(spacing_above, spacing_below)
+        levels[hit] = level
+        undecided = undecided & ~hit
+    return levels.tolist()
+
+def add_page_lines(builder, text_dict, page_num):
+    for block in text_dict["blocks"]:
+        if "lines" not in block:
+            continue
+        for line in block["lines"]:
+            spans = line["spans"]
+            if len(spans) == 1:
+                span = spans[0]
+                text, avg_size, primary_font = span["text"], span["size"], span["font"]
+            else:
+                text = "".join(span["text"] for span in spans)
+                avg_size = statistics.mean(span["size"] for span in spans) if spans else 0
+                primary_font = spans[0]["font"] if spans else "Unknown"
+            if text:
                 bbox = line["bbox"]
-                for span in line["spans"]:
-                    text += span["text"]
-                    font_sizes.append(span["size"])
-                    font_names.append(span["font"])
-                clean_text = text
-                if clean_text:
-                    avg_size = statistics.mean(font_sizes)
-                    primary_font = font_names[0] if font_names else "Unknown"
-                    blocks.append({
-                        "text": clean_text,
-                        "font_size": round(avg_size, 2),
-                        "font_name": primary_font,
-                        "page": page_num - 1,
-                        "x0": bbox[0],
-                        "x1": bbox[2],
-                        "y0": bbox[1],
-                        "y1": bbox[3]
-                    })
-
-
-
-    rows = group_blocks_into_rows(blocks)
-    tables = detect_table_like_groups(rows)
-    table_blocks = flatten_table_blocks(tables)
-    blocks = [b for b in blocks if b not in table_blocks]
-
-    if not blocks:
+                builder.add(text, round(avg_size, 2), primary_font, page_num,
+                            bbox[0], bbox[2], bbox[1], bbox[3])
+
+
+def read_blocks(pdf):
+    """BlockStore of every text line; pdf is a path or an open PdfDocument."""
+    with tracing.span("pdf.open"):
+        doc, owned = open_document(pdf)
+    try:
+        with tracing.span("extract.blocks", pages=len(doc)) as span:
+            builder = BlockStoreBuilder()
+            for page_num, text_dict in doc.iter_text_dicts():
+                add_page_lines(builder, text_dict, page_num)
+            span.set(blocks=len(builder))
+        tracing.count("pages", len(doc))
+        tracing.count("blocks", len(builder))
+        return builder.build()
+    finally:
+        if owned:
+            doc.close()
+
+
+def remove_table_blocks(store):
+    return store.take(~detect_table_regions(store))
+
+
+def ends_list_item(store, same_page):
+    """
+    For each pair of neighbouring lines, whether the second starts left of
+    the first while the first belongs to a bulleted item (the line after a
+    bullet glyph, or a line aligned under it): the list has ended there.
+    """
+    positions = np.arange(len(store))
+    bullet = np.fromiter((BULLET_GLYPHS.fullmatch(t) is not None for t in store.texts()), dtype=bool,
+                         count=len(store))
+    item_start = np.zeros(len(store), dtype=bool)
+    item_start[1:] = bullet[:-1] & same_page
+    aligned = np.zeros(len(store), dtype=bool)
+    aligned[1:] = same_page & (np.abs(store.x0[1:] - store.x0[:-1]) <= 1)
+    chain_start = np.maximum.accumulate(np.where(aligned, 0, positions))
+    in_item = item_start[chain_start] & ~bullet
+    return in_item[:-1] & (store.x0[1:] < store.x0[:-1] - 1)
+
+
+def merge_blocks(store):
+    """
+    Joins each line with the next one when both share font size, font family
+    and page and sit less than 30pt apart. A merged line is never merged again.
+    """
+    n = len(store)
+    if n < 2:
+        return store
+    family = np.array([normalize_font_name(f) for f in store.fonts], dtype=object)
+    same_family = np.array([a == b for a, b in zip(family[store.font_id[:-1]], family[store.font_id[1:]])], dtype=bool)
+    same_page = store.page[1:] == store.page[:-1]
+    can_merge = (
+        (store.font_size[1:] == store.font_size[:-1]) &
+        same_family &
+        same_page &
+        (np.abs(store.y0[1:] - store.y1[:-1]) < 30) &
+        ~ends_list_item(store, same_page)
+    )
+    # Greedy pairing: inside a run of mergeable neighbours every other line starts a pair
+    positions = np.arange(n - 1)
+    run_start = np.maximum.accumulate(np.where(~can_merge, positions + 1, 0))
+    pair_start = can_merge & ((positions - run_start) % 2 == 0)
+
+    keep = np.ones(n, dtype=bool)
+    keep[1:][pair_start] = False
+    texts = store.texts()
+    for i in np.flatnonzero(pair_start).tolist():
+        texts[i] += texts[i + 1]
+    kept = np.flatnonzero(keep)
+    merged = store.take(kept)
+    return merged.with_texts([texts[i] for i in kept.tolist()])
+
+
+def most_common_value(values):
+    """Mode of values; ties go to the value seen first, like Counter.most_common."""
+    unique, first, counts = np.unique(values, return_index=True, return_counts=True)
+    tied = first[counts == counts.max()]
+    return values[tied.min()].item()
+
+
+def follower_thresholds(store, decorative):
+    """
+    has_good_follower for block i holds exactly when body_font <= threshold[i]:
+    the following block (and the one after it, if neither is decorative) must
+    be at least body size, and a decorative follower rules the block out.
+    """
+    n = len(store)
+    first = np.full(n, -np.inf)
+    first[:-1] = np.where(decorative[1:], -np.inf, store.font_size[1:])
+    second = np.full(n, -np.inf)
+    second[:-2] = np.where(decorative[1:-1] | decorative[2:], -np.inf, store.font_size[2:])
+    return np.maximum(first, second)
+
+
+def build_outline(blocks):
+    if not isinstance(blocks, BlockStore):
+        blocks = BlockStore.from_blocks(blocks)
+    with tracing.span("extract.tables", blocks=len(blocks)):
+        blocks = remove_table_blocks(blocks)
+
+    if not len(blocks):
         return {"title": "", "outline": []}
-    
-    
-
-    merged_blocks = []
-    skip_next = False
-    for i in range(len(blocks)):
-        if skip_next:
-            skip_next = False
-            continue
-        current = blocks[i]
-        merged_text = current["text"]
-        font_size = current["font_size"]
-        font_name = current["font_name"]
-        page = current["page"]
-        y1 = current["y1"]
-
-        if i + 1 < len(blocks):
-            next_block = blocks[i + 1]
-            same_font = next_block["font_size"] == font_size
-            same_style = normalize_font_name(next_block["font_name"]) == normalize_font_name(font_name)
-            same_page = next_block["page"] == page
-            close_vertically = abs(next_block["y0"] - y1) < 30
-            
-            if same_font and same_style and same_page and close_vertically:
-                merged_text += next_block["text"]
-                skip_next = True
-            
 
-        merged_blocks.append({
-            "text": merged_text,
-            "font_size": font_size,
-            "font_name": font_name,
-            "page": page,
-            "x0": current["x0"],
-            "x1": current["x1"],
-            "y0": current["y0"],
-            "y1": current["y1"]
-        })
+    with tracing.span("extract.merge", blocks=len(blocks)):
+        merged = merge_blocks(blocks)
+        body_font = most_common_value(merged.font_size)
 
+        features = block_features(merged.texts())
+        thresholds = follower_thresholds(merged, features["decorative"])
+        kept = (merged.font_size < body_font) | (body_font <= thresholds)
+        cleaned = merged.take(kept)
+        features = {name: column[kept] for name, column in features.items()}
 
-    font_counter = Counter(b["font_size"] for b in merged_blocks)
-    body_font = font_counter.most_common(1)[0][0]
-
-    cleaned_blocks = []
-    for i, block in enumerate(merged_blocks):
-        size = block["font_size"]
-        text = block["text"]
-        if size >= body_font:
-            if has_good_follower(i, merged_blocks, body_font):
-                cleaned_blocks.append(block)
-        else:
-            cleaned_blocks.append(block)
-
-    filtered_font_counter = Counter(b["font_size"] for b in cleaned_blocks)
-    font_ranks = sorted(set(filtered_font_counter.keys()), reverse=True)
+    font_ranks = np.unique(cleaned.font_size)[::-1].tolist()
 
     title_font = font_ranks[0]
     h1_font = font_ranks[1] if len(font_ranks) > 1 else title_font
@@ -244,31 +354,36 @@ def extract_outline(pdf_path):
 
     skip_outline = h1_font == h2_font
 
+    texts = cleaned.texts()
+    sizes = cleaned.font_size.tolist()
+    pages = cleaned.page.tolist()
+    with tracing.span("extract.headings", blocks=len(cleaned)):
+        levels = heading_levels(cleaned, features, body_font, h1_font, h2_font)
+
     title = ""
-    title_block = None
+    title_index = None
     outline = []
     seen = set()
 
-    for i, block in enumerate(cleaned_blocks):
-        text = block["text"]
-        size = block["font_size"]
-        page = block["page"]
+    for i, text in enumerate(texts):
+        size = sizes[i]
+        page = pages[i]
 
         if not title and size == title_font:
             title = text
-            title_block = block
+            title_index = i
             continue
 
         if skip_outline:
             continue
 
-        level = determine_heading_level(i, cleaned_blocks, body_font, h1_font, h2_font)
+        level = levels[i]
 
         if level:
-            if re.fullmatch(r"[.\-•*·\s]+", text):
+            if DOTS_ONLY.fullmatch(text):
              continue
 
-            if re.search(r"\d+$", text):
+            if ENDS_IN_DIGIT.search(text):
              continue
 
             key = (text.lower(), page)
@@ -283,79 +398,87 @@ def extract_outline(pdf_path):
 
 
     existing_keys = set((item["text"].lower(), item["page"]) for item in outline)
-    for i in reversed(range(len(cleaned_blocks))):
-        block = cleaned_blocks[i]
-        text = block["text"]
-        page = block["page"]
-        size = block["font_size"]
-        words = text.split()
-
-        if len(words) < 15 or (text.lower(), page) in existing_keys:
+    y0s = cleaned.y0.tolist()
+    y1s = cleaned.y1.tolist()
+    words = features["words"].tolist()
+    bullets_only = features["bullets_only"].tolist()
+    for i in reversed(range(len(texts))):
+        text = texts[i]
+        page = pages[i]
+
+        # a bold short line right above a long paragraph or a bulleted list is a heading
+        if (words[i] < 15 and not bullets_only[i]) or (text.lower(), page) in existing_keys:
             continue
 
         for j in range(i - 1, max(i - 4, -1), -1):
-            candidate = cleaned_blocks[j]
-            cand_text = candidate["text"]
-            cand_words = cand_text.split()
-            cand_size = candidate["font_size"]
+            cand_text = texts[j]
 
             if (
-            len(cand_words) <= 10 and
-            "bold" in candidate["font_name"].lower() and
-            abs(block["y0"] - candidate["y1"]) > 10 and
-            (cand_text.lower(), candidate["page"]) not in existing_keys
+            words[j] <= 10 and
+            "bold" in cleaned.font_name(j).lower() and
+            abs(y0s[i] - y1s[j]) > 10 and
+            (cand_text.lower(), pages[j]) not in existing_keys
         ):
-                level = determine_heading_level(j, cleaned_blocks, body_font, h1_font, h2_font)
+                level = levels[j]
                 if level:
                     outline.append({
                     "level": level,
                     "text": cand_text,
-                    "page": candidate["page"]
+                    "page": pages[j]
                 })
-                    existing_keys.add((cand_text.lower(), candidate["page"]))
+                    existing_keys.add((cand_text.lower(), pages[j]))
                 break
 
 
     
 
     outline = [entry for entry in outline if not is_duplicate_title(entry["text"], title)]
-        # Sort outline by page and y-coordinate
-    outline.sort(key=lambda x: (x["page"], next(
-        (b["y0"] for b in cleaned_blocks if b["text"] == x["text"] and b["page"] == x["page"]), 0.0
-    )))
-
-    # Now attach section text for each heading
-    outline_with_text = []
-    for idx, heading in enumerate(outline):
-        current_page = heading["page"]
-        current_text = heading["text"]
-
-        # Start position
-        start_index = next((i for i, b in enumerate(cleaned_blocks)
-                            if normalize(b["text"]) == normalize(current_text) and b["page"] == current_page
-), None)
-        if start_index is None:
-            continue
 
-        # End position: next heading (or end of doc)
-        if idx + 1 < len(outline):
-            next_heading = outline[idx + 1]
-            end_index = next((i for i, b in enumerate(cleaned_blocks)
-                              if b["text"] == next_heading["text"] and b["page"] == next_heading["page"]), len(cleaned_blocks))
-        else:
-            end_index = len(cleaned_blocks)
-
-        # Get section text from in-between blocks
-        section_blocks = cleaned_blocks[start_index + 1:end_index]
-        section_text = " ".join([b["text"].strip() for b in section_blocks if b["text"].strip()])
-        section_text = re.sub(r'\s+', ' ', section_text).strip()
-
-        outline_with_text.append({
-            "level": heading["level"],
-            "text": heading["text"],
-            "page": heading["page"],
-            "section_text": section_text
-        })
+    # (text, page) -> position of the first matching cleaned block, built once
+    first_exact = {}
+    first_normalized = {}
+    for pos, text in enumerate(texts):
+        first_exact.setdefault((text, pages[pos]), pos)
+        first_normalized.setdefault((normalize(text), pages[pos]), pos)
+
+    # Sort outline by page and y-coordinate
+    def position_y0(entry):
+        pos = first_exact.get((entry["text"], entry["page"]))
+        return y0s[pos] if pos is not None else 0.0
+
+    outline.sort(key=lambda x: (x["page"], position_y0(x)))
+
+    with tracing.span("extract.sections", headings=len(outline)):
+        # Now attach section text for each heading
+        outline_with_text = []
+        for idx, heading in enumerate(outline):
+            current_page = heading["page"]
+            current_text = heading["text"]
+
+            # Start position
+            start_index = first_normalized.get((normalize(current_text), current_page))
+            if start_index is None:
+                continue
+
+            # End position: next heading (or end of doc)
+            if idx + 1 < len(outline):
+                next_heading = outline[idx + 1]
+                end_index = first_exact.get((next_heading["text"], next_heading["page"]), len(texts))
+            else:
+                end_index = len(texts)
+
+            # Get section text from in-between blocks
+            section_texts = (t.strip() for t in texts[start_index + 1:end_index])
+            section_text = " ".join([t for t in section_texts if t])
+            section_text = WHITESPACE_RUN.sub(' ', section_text).strip()
+
+            outline_with_text.append({
+                "level": heading["level"],
+                "text": heading["text"],
+                "page": heading["page"],
+                "section_text": section_text
+            })
+    tracing.count("sections", len(outline_with_text))
 
     if h1_font ==h2_font and h2_font==body_font:
         return {
@@ -366,13 +489,9 @@ def extract_outline(pdf_path):
     
 
 
-    if title and title_block:
-        title_page = title_block["page"]
-        title_index = cleaned_blocks.index(title_block)
-        earlier_h1_h2 = any(
-            (b["font_size"] in {h1_font, h2_font} and cleaned_blocks.index(b) < title_index)
-            for b in cleaned_blocks
-        )
+    if title and title_index is not None:
+        title_page = pages[title_index]
+        earlier_h1_h2 = bool(np.isin(cleaned.font_size[:title_index], [h1_font, h2_font]).any())
         if earlier_h1_h2:
             return {
                 "title": "",
@@ -387,3 +506,6 @@ def extract_outline(pdf_path):
             return {"title": title, "outline": outline_with_text}
     else:
         return {"title": title, "outline": outline_with_text}
+
+def extract_outline(pdf):
+    return build_outline(read_blocks(pdf))
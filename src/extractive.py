@@ -0,0 +1,71 @@
+import re
+
+import numpy as np
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'“(\[A-Z0-9•])|\s+(?=•\s)")
+
+# T5 counts sub-word tokens; English text runs about 0.75 words per token
+WORDS_PER_TOKEN = 0.75
+
+
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_END.split(text) if s.strip()]
+
+
+class ExtractiveSummarizer:
+    """
+    Fast alternative to the T5 Summarizer: keeps the sentences of each section
+    closest to the query, in their original order.
+
+    Sentences of every text in a call are encoded in one embed_sections batch
+    on the already loaded Embedder. Without a query embedding, sentences are
+    scored against their section's mean embedding instead. max_length is a
+    token budget, as for the abstractive summarizer.
+    """
+
+    # summaries depend on the query, so they cannot be shared between queries
+    query_dependent = True
+
+    def __init__(self, embedder, max_sentences=3):
+        self.embedder = embedder
+        self.max_sentences = max_sentences
+
+    def summarize(self, text, max_length=120, min_length=30, query_embedding=None):
+        return self.summarize_batch([text], max_length=max_length, min_length=min_length,
+                                    query_embedding=query_embedding)[0]
+
+    def summarize_batch(self, texts, max_length=120, min_length=30, batch_size=None, query_embedding=None):
+        summaries = [None] * len(texts)
+        sentences, owners = [], []
+        for i, text in enumerate(texts):
+            if not text or len(text.strip()) < 50:
+                summaries[i] = (text or "").strip()
+                continue
+            for sentence in split_sentences(text.strip()):
+                sentences.append(sentence)
+                owners.append(i)
+        if not sentences:
+            return summaries
+
+        embeddings = np.asarray(self.embedder.embed_sections(sentences), dtype=np.float32)
+        owners = np.asarray(owners)
+        max_words = max(1, int(max_length * WORDS_PER_TOKEN))
+
+        for i in np.unique(owners).tolist():
+            positions = np.flatnonzero(owners == i)
+            section = embeddings[positions]
+            target = query_embedding if query_embedding is not None else section.mean(axis=0)
+            scores = section @ np.asarray(target, dtype=np.float32)
+            # best first; ties keep document order
+            ranked = positions[np.argsort(-scores, kind="stable")]
+
+            chosen, words = [], 0
+            for pos in ranked[:self.max_sentences].tolist():
+                length = len(sentences[pos].split())
+                if chosen and words + length > max_words:
+                    continue
+                chosen.append(pos)
+                words += length
+            summary = " ".join(sentences[pos] for pos in sorted(chosen))
+            summaries[i] = " ".join(summary.split()[:max_words])
+        return summaries
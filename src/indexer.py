@@ -0,0 +1,276 @@
+"""
+Incremental indexing of a folder of PDFs.
+
+A manifest (index_dir/manifest.json) records the size, mtime and content
+hash of every indexed PDF along with its section count, and the size,
+mtime and error of every PDF that failed to extract, which is skipped
+until it changes. The outlines live
+in the OutlineCache and the embeddings in the EmbeddingStore, both keyed by
+that hash. update() only hashes files whose size or mtime moved and only
+extracts and embeds files whose content changed.
+
+The caches are shared with other indexes and with main.py and the server,
+so update() never deletes from them. The hashes of deleted or replaced
+files are remembered in the manifest, and purge() drops their entries
+once no manifest under the same index root refers to them.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from src.cache import OutlineCache, atomic_write_bytes, file_hash
+from src.extract import EXTRACTOR_VERSION, extract_outline
+from src.pipeline import embed_records
+from src.sections import iter_document_sections, outline_records
+from src.streaming import extract_outline_streaming
+from src.vector_store import EmbeddingStore
+
+MANIFEST_VERSION = 1
+
+
+def default_index_dir(pdf_dir, root="cache/index"):
+    """One index per PDF folder: root/<folder name>-<hash of its absolute path>."""
+    path = os.path.abspath(pdf_dir)
+    digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(root, f"{os.path.basename(path.rstrip(os.sep)) or 'root'}-{digest}")
+
+
+class CorpusIndex:
+    def __init__(self, pdf_dir, index_dir=None, cache_dir="cache/outlines", embeddings_dir="cache/embeddings",
+                 streaming=False):
+        self.pdf_dir = pdf_dir
+        index_dir = index_dir or default_index_dir(pdf_dir)
+        self.index_root = os.path.dirname(os.path.abspath(index_dir))
+        self.manifest_path = os.path.join(index_dir, "manifest.json")
+        self.cache_dir = cache_dir
+        self.embeddings_dir = embeddings_dir
+        self.streaming = streaming
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            manifest = None
+        if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+            manifest = {"version": MANIFEST_VERSION, "extraction": None, "files": {}}
+        manifest.setdefault("orphans", [])
+        manifest.setdefault("failed", {})
+        return manifest
+
+    def save(self):
+        data = json.dumps(self.manifest, indent=1, sort_keys=True).encode("utf-8")
+        atomic_write_bytes(self.manifest_path, data)
+
+    @property
+    def files(self):
+        return self.manifest["files"]
+
+    def _settings(self, embedder, chunker):
+        extraction = {"extractor_version": EXTRACTOR_VERSION, "streaming": self.streaming}
+        embedding = None
+        if embedder is not None:
+            embedding = {"model_id": embedder.model_id,
+                         "chunking": [chunker.window, chunker.overlap] if chunker is not None else None}
+        return extraction, embedding
+
+    def _pdf_names(self):
+        if not os.path.isdir(self.pdf_dir):
+            return []
+        return sorted(f for f in os.listdir(self.pdf_dir) if f.lower().endswith(".pdf"))
+
+    def scan(self, embedder=None, chunker=None, retry_failed=False):
+        """
+        Compares pdf_dir with the manifest. Returns {added, changed, touched,
+        unchanged, removed, skipped}: lists of filenames, where added and
+        changed map to (stat, hash) in "pending". Only files whose size or
+        mtime differ from the manifest are hashed; "touched" ones turned out
+        identical. A new extractor version marks every file changed, and so
+        does, for a file, an embedder other than the one it was last embedded
+        with. Files that failed before are "skipped" while their size and
+        mtime stay the same, unless retry_failed or the extractor changed.
+        """
+        extraction, embedding = self._settings(embedder, chunker)
+        stale = self.manifest["extraction"] != extraction
+        failures = self.manifest["failed"]
+
+        changes = {"added": [], "changed": [], "touched": [], "unchanged": [], "removed": [], "skipped": [],
+                   "pending": {}}
+        names = self._pdf_names()
+        for name in names:
+            path = os.path.join(self.pdf_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entry = self.files.get(name)
+            failure = failures.get(name)
+            if (entry is None and failure and not stale and not retry_failed
+                    and failure["size"] == stat.st_size and failure["mtime_ns"] == stat.st_mtime_ns):
+                changes["skipped"].append(name)
+                continue
+            redo = stale or (entry is not None and embedder is not None and entry["embedding"] != embedding)
+            if entry and not redo and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                changes["unchanged"].append(name)
+                continue
+            pdf_hash = file_hash(path)
+            if entry is None:
+                changes["added"].append(name)
+            elif entry["hash"] != pdf_hash or redo:
+                changes["changed"].append(name)
+            else:
+                changes["touched"].append(name)
+                continue
+            changes["pending"][name] = (stat, pdf_hash)
+
+        present = set(names)
+        changes["removed"] = [name for name in self.files if name not in present]
+        return changes
+
+    def update(self, embedder=None, chunker=None, workers=1, extract=None, retry_failed=False):
+        """
+        Brings the index up to date with pdf_dir and saves the manifest.
+        With an embedder, new and changed documents are embedded into the
+        EmbeddingStore as well. Returns a report of what was done; a file
+        that fails to extract is left out of the index and recorded as
+        failed, and is not tried again until it changes (or retry_failed).
+        Cache entries of files that left the index are only recorded as
+        orphans, for purge().
+        extract(documents, hashes) replaces iter_document_sections for the
+        new and changed files (e.g. src.bulk.BulkRunner.iter_sections).
+        """
+        changes = self.scan(embedder, chunker, retry_failed)
+        extraction, embedding = self._settings(embedder, chunker)
+        store = None
+        if embedder is not None and self.embeddings_dir:
+            store = EmbeddingStore(self.embeddings_dir, embedder.model_id)
+
+        # touched files: same content, only the stat moved
+        for name in changes["touched"]:
+            stat = os.stat(os.path.join(self.pdf_dir, name))
+            self.files[name].update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+        pending = list(changes["pending"])
+        documents = [(os.path.join(self.pdf_dir, name), name) for name in pending]
+        failed = []
+        old_hashes = set()
+        hashes = [changes["pending"][name][1] for name in pending]
+        if extract is None:
+            results = iter_document_sections(documents, workers=workers, cache_dir=self.cache_dir,
+                                             streaming=self.streaming, hashes=hashes)
+        else:
+            results = extract(documents, hashes)
+        for idx, records, error in results:
+            name = pending[idx]
+            stat, pdf_hash = changes["pending"][name]
+            if error is not None:
+                print(f"[!] Failed to index {name}: {error}")
+                failed.append({"document": name, "error": str(error)})
+                self.manifest["failed"][name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                                 "hash": pdf_hash, "error": str(error)}
+                if name in self.files:
+                    old_hashes.add(self.files.pop(name)["hash"])
+                continue
+            self.manifest["failed"].pop(name, None)
+            if embedder is not None and records:
+                embed_records(embedder, records, store, chunker)
+            old = self.files.get(name)
+            if old and old["hash"] != pdf_hash:
+                old_hashes.add(old["hash"])
+            embedded = embedding
+            if embedder is None and old and old["hash"] == pdf_hash:
+                embedded = old["embedding"]
+            self.files[name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": pdf_hash,
+                                "sections": len(records), "embedding": embedded}
+
+        for name in changes["removed"]:
+            old_hashes.add(self.files.pop(name)["hash"])
+        present = set(self._pdf_names())
+        for name in [n for n in self.manifest["failed"] if n not in present]:
+            del self.manifest["failed"][name]
+        current = {entry["hash"] for entry in self.files.values()}
+        self.manifest["orphans"] = sorted((set(self.manifest["orphans"]) | old_hashes) - current)
+
+        self.manifest["extraction"] = extraction
+        self.save()
+
+        failed_names = {f["document"] for f in failed}
+        return {
+            "added": [n for n in changes["added"] if n not in failed_names],
+            "changed": [n for n in changes["changed"] if n not in failed_names],
+            "removed": changes["removed"],
+            "touched": changes["touched"],
+            "unchanged": len(changes["unchanged"]),
+            "failed": failed,
+            "skipped": changes["skipped"],
+            "documents": len(self.files),
+            "sections": sum(entry["sections"] for entry in self.files.values()),
+            "orphaned": len(self.manifest["orphans"]),
+        }
+
+    def referenced_hashes(self):
+        """Content hashes of the files of every index under index_root, this one included."""
+        hashes = {entry["hash"] for entry in self.files.values()}
+        if not os.path.isdir(self.index_root):
+            return hashes
+        for name in os.listdir(self.index_root):
+            path = os.path.join(self.index_root, name, "manifest.json")
+            if os.path.abspath(path) == os.path.abspath(self.manifest_path):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    files = json.load(f)["files"]
+            except (FileNotFoundError, NotADirectoryError, ValueError, KeyError, TypeError):
+                continue
+            hashes.update(entry["hash"] for entry in files.values())
+        return hashes
+
+    def purge(self, embedder=None):
+        """
+        Deletes the outline cache entries (and, with an embedder, that model's
+        embeddings) of orphaned hashes no index refers to any more. Entries
+        main.py or the server still use are re-created on their next run.
+        Returns the number of hashes purged.
+        """
+        referenced = self.referenced_hashes()
+        orphans = [h for h in self.manifest["orphans"] if h not in referenced]
+        cache = OutlineCache(self.cache_dir) if self.cache_dir else None
+        store = EmbeddingStore(self.embeddings_dir, embedder.model_id) if embedder and self.embeddings_dir else None
+        for pdf_hash in orphans:
+            if cache is not None:
+                cache.delete(pdf_hash)
+            if store is not None:
+                store.delete(pdf_hash)
+        # referenced ones stay listed: they become orphans again if their last index drops them
+        self.manifest["orphans"] = [h for h in self.manifest["orphans"] if h in referenced]
+        self.save()
+        return len(orphans)
+
+    def outline(self, name):
+        """The cached outline of an indexed file (re-extracted if the cache dropped it)."""
+        pdf_hash = self.files[name]["hash"]
+        path = os.path.join(self.pdf_dir, name)
+        if not self.cache_dir:
+            return extract_outline_streaming(path) if self.streaming else extract_outline(path)
+        return OutlineCache(self.cache_dir).get_or_extract(path, pdf_hash=pdf_hash, streaming=self.streaming)
+
+    def records(self, names=None):
+        """Section records of the indexed files (all of them by default), in filename order."""
+        records = []
+        for name in sorted(self.files) if names is None else names:
+            records.extend(outline_records(self.outline(name), name, self.files[name]["hash"]))
+        return records
+
+    def load(self, embedder, chunker=None, names=None):
+        """(section records, embeddings) of the indexed files, the embeddings read back from the store."""
+        store = EmbeddingStore(self.embeddings_dir, embedder.model_id) if self.embeddings_dir else None
+        all_records, matrices = [], []
+        for name in sorted(self.files) if names is None else names:
+            records = self.records([name])
+            if records:
+                all_records.extend(records)
+                matrices.append(embed_records(embedder, records, store, chunker))
+        return all_records, np.concatenate(matrices) if matrices else None
@@ -0,0 +1,95 @@
+import threading
+
+SUMMARY_MODES = ("abstractive", "extractive")
+
+
+class ModelRegistry:
+    """
+    Loads the embedding and summary models lazily on first use and keeps them
+    for the lifetime of the process, so every case after the first reuses them.
+
+    embed_backend and summary_backend pick the inference backend (see
+    src.backends). summary_mode is "abstractive" (T5 beam search) or
+    "extractive" (query-closest sentences picked with the embedder, see
+    src.extractive). With batching=True the models are wrapped in micro-batchers
+    (src.batching) so concurrent callers share forward passes.
+    """
+
+    def __init__(self, embedding_model_path="models/embedding_model", summary_model_dir="models/summary_model", device="cpu",
+                 batching=False, max_wait_ms=5.0, embed_batch_size=64, summary_batch_size=8,
+                 embed_backend="torch", summary_backend="torch", summary_mode="abstractive"):
+        self.embedding_model_path = embedding_model_path
+        self.summary_model_dir = summary_model_dir
+        self.device = device
+        self.embed_backend = embed_backend
+        self.summary_backend = summary_backend
+        if summary_mode not in SUMMARY_MODES:
+            raise ValueError(f"Unknown summary mode {summary_mode!r}; expected one of {', '.join(SUMMARY_MODES)}")
+        self.summary_mode = summary_mode
+        self.batching = batching
+        self.max_wait_ms = max_wait_ms
+        self.embed_batch_size = embed_batch_size
+        self.summary_batch_size = summary_batch_size
+        self._embedder = None
+        self._summarizer = None
+        self._lock = threading.Lock()
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            with self._lock:
+                if self._embedder is None:
+                    from src.embed import Embedder
+                    embedder = Embedder(self.embedding_model_path, device=self.device, backend=self.embed_backend)
+                    if self.batching:
+                        from src.batching import BatchedEmbedder
+                        embedder = BatchedEmbedder(embedder, self.embed_batch_size, self.max_wait_ms)
+                    self._embedder = embedder
+        return self._embedder
+
+    @property
+    def summarizer(self):
+        if self._summarizer is None:
+            # resolved outside the lock: the embedder property takes it too
+            embedder = self.embedder if self.summary_mode == "extractive" else None
+            with self._lock:
+                if self._summarizer is None:
+                    if embedder is not None:
+                        from src.extractive import ExtractiveSummarizer
+                        self._summarizer = ExtractiveSummarizer(embedder)
+                        return self._summarizer
+                    from src.summarizer import Summarizer
+                    summarizer = Summarizer(self.summary_model_dir, device=self.device, backend=self.summary_backend)
+                    if self.batching:
+                        from src.batching import BatchedSummarizer
+                        summarizer = BatchedSummarizer(summarizer, self.summary_batch_size, self.max_wait_ms)
+                    self._summarizer = summarizer
+        return self._summarizer
+
+    def warm_up(self, embedder=True, summarizer=True):
+        """Load the requested models and run one tiny inference so first-request latency is paid now."""
+        if embedder:
+            self.embedder.embed_query("warm up", "warm up")
+        if summarizer:
+            self.summarizer.summarize("warm up " * 20, max_length=8, min_length=1)
+        return self
+
+    def stats(self):
+        """Micro-batching stats ({"embed": ..., "summarize": ...}) of the models loaded so far."""
+        if not self.batching:
+            return {}
+        loaded = {"embed": self._embedder, "summarize": self._summarizer}
+        return {name: model.stats() for name, model in loaded.items() if hasattr(model, "stats")}
+
+
+_default_registry = None
+_default_lock = threading.Lock()
+
+
+def get_registry():
+    global _default_registry
+    if _default_registry is None:
+        with _default_lock:
+            if _default_registry is None:
+                _default_registry = ModelRegistry()
+    return _default_registry
@@ -0,0 +1,39 @@
+import fitz
+
+# get_text("dict") defaults to TEXTFLAGS_DICT, which also decodes every image
+# into the result. Nothing here reads image blocks, so leave them out.
+TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+
+class PdfDocument:
+    """One open PDF whose pages are parsed with TEXT_FLAGS, one page at a time."""
+
+    def __init__(self, path):
+        self.path = path
+        self.doc = fitz.open(path)
+
+    def __len__(self):
+        return self.doc.page_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.doc.close()
+
+    def text_dict(self, page_number):
+        return self.doc.load_page(page_number).get_text("dict", flags=TEXT_FLAGS)
+
+    def iter_text_dicts(self):
+        for page_number in range(len(self)):
+            yield page_number, self.text_dict(page_number)
+
+
+def open_document(pdf):
+    """(PdfDocument, owned): wraps a path, or passes an already open PdfDocument through."""
+    if isinstance(pdf, PdfDocument):
+        return pdf, False
+    return PdfDocument(pdf), True
@@ -0,0 +1,202 @@
+from datetime import datetime
+
+import numpy as np
+
+from src import tracing
+from src.ann import IVFIndex
+from src.chunking import chunk_owners, chunk_records, embed_sorted
+from src.ranking import rank_sections, rank_sections_batch
+from src.sections import iter_document_sections
+
+
+def embed_records(embedder, records, store=None, chunker=None):
+    """
+    Embeddings for one document's section records, through the on-disk store
+    when there is one. With a chunker each record gets a "chunks" list and
+    the matrix has one row per chunk instead of one per section.
+    """
+    if chunker is not None:
+        chunk_records(records, chunker)
+        section_texts = [(chunk + s["doc"]) for s in records for chunk in s["chunks"]]
+    else:
+        section_texts = [(s["text"] + s["doc"]) for s in records]
+
+    def embed_fn(texts):
+        # only texts the store does not have get here
+        tracing.count("embedded_texts", len(texts))
+        return embed_sorted(embedder.embed_sections, texts)
+
+    with tracing.span("embed", doc=records[0]["doc"] if records else None, sections=len(records),
+                      texts=len(section_texts)):
+        if store is not None:
+            return store.get_or_embed(records[0]["doc_hash"], section_texts, embed_fn)
+        return embed_fn(section_texts)
+
+
+def extract_and_embed(documents, embedder, workers=1, cache_dir=None, store=None, chunker=None, streaming=False):
+    """
+    documents: list of (filepath, filename) pairs. Embeds each document as soon
+    as its sections arrive. Returns (records, embeddings, failed filenames),
+    records in input order; embeddings is None when no sections were found.
+    """
+    per_document = [([], None)] * len(documents)
+    failures = []
+    for idx, records, error in iter_document_sections(documents, workers=workers, cache_dir=cache_dir,
+                                                      streaming=streaming):
+        filename = documents[idx][1]
+        if error is not None:
+            print(f"[!] Failed to extract {filename}: {error}")
+            failures.append(filename)
+            continue
+        if records:
+            per_document[idx] = (records, embed_records(embedder, records, store, chunker))
+
+    section_records = [r for records, _ in per_document for r in records]
+    matrices = [e for _, e in per_document if e is not None]
+    return section_records, np.concatenate(matrices) if matrices else None, failures
+
+
+def build_ann_index(embeddings, n_probe):
+    """
+    An IVFIndex over embeddings that scans n_probe lists per query, or None
+    (exact search) when n_probe is 0. Approximate: see src.ann for the
+    recall it trades for speed.
+    """
+    if not n_probe or embeddings is None:
+        return None
+    with tracing.span("ann.build", rows=len(embeddings), n_probe=n_probe):
+        return IVFIndex(n_probe=n_probe).build(embeddings)
+
+
+def summary_inputs(sections, section_records, section_embeddings, query_embedding):
+    """Text to summarize per section: the whole text, or for a chunked section its chunk closest to the query."""
+    owners = chunk_owners(section_records)
+    if owners is None:
+        return [section["text"] for section in sections]
+    starts = np.concatenate([[0], np.cumsum([len(r["chunks"]) for r in section_records])])
+    position = {id(record): i for i, record in enumerate(section_records)}
+    inputs = []
+    for section in sections:
+        chunks = section["chunks"]
+        if len(chunks) == 1:
+            inputs.append(section["text"])
+            continue
+        i = position[id(section)]
+        rows = np.asarray(section_embeddings[starts[i]:starts[i + 1]], dtype=np.float32)
+        inputs.append(chunks[int(np.argmax(rows @ np.asarray(query_embedding, dtype=np.float32)))])
+    return inputs
+
+
+def rank_top_sections(embedder, persona, job, section_records, section_embeddings, query_embedding=None,
+                      pooling="max", top_k=5, index=None):
+    """
+    (up to top_k section records for persona/job, best first; the query
+    embedding). index: optional build_ann_index over section_embeddings.
+    """
+    query_string = f"Persona: {persona}. Job: {job}"
+    if query_embedding is None:
+        with tracing.span("embed.query"):
+            query_embedding = embedder.embed_query(persona, job)
+    with tracing.span("rank", sections=len(section_records), rows=len(section_embeddings)):
+        ranked_sections = embedder.rank_sections_by_query(query_embedding, query_string, section_records,
+                                                          section_embeddings, top_k=top_k, index=index,
+                                                          chunk_owner=chunk_owners(section_records), pooling=pooling)
+    return ranked_sections, query_embedding
+
+
+def rank_and_summarize(embedder, summarizer, persona, job, section_records, section_embeddings, query_embedding=None,
+                       pooling="max", index=None):
+    """Top sections for persona/job, each as {document, page_number, section_title, importance_rank, refined_text}."""
+    ranked_sections, query_embedding = rank_top_sections(embedder, persona, job, section_records, section_embeddings,
+                                                         query_embedding, pooling, index=index)
+    top_sections = []
+    with tracing.span("summarize", sections=len(ranked_sections)):
+        texts = summary_inputs(ranked_sections, section_records, section_embeddings, query_embedding)
+        summaries = summarizer.summarize_batch(texts, query_embedding=query_embedding)
+    for rank, (section, summary) in enumerate(zip(ranked_sections, summaries), 1):
+        top_sections.append({
+            "document": section["doc"],
+            "page_number": section["page"],
+            "section_title": section["heading"],
+            "importance_rank": rank,
+            "refined_text": summary
+        })
+    return top_sections
+
+
+def rank_and_summarize_many(embedder, summarizer, queries, section_records, section_embeddings, pooling="max",
+                            top_k=5, index=None):
+    """
+    rank_and_summarize for many (persona, job) pairs over the same sections:
+    the queries are embedded in one batch and scored with one queries ×
+    sections product. A text picked by several queries is summarized once,
+    unless the summarizer is query dependent (extractive mode). With an ANN
+    index each query is ranked on its own candidates instead. Returns one
+    top_sections list per query.
+    """
+    if not queries:
+        return []
+    with tracing.span("embed.query", queries=len(queries)):
+        query_embeddings = np.asarray(embedder.embed_queries(queries))
+    owners = chunk_owners(section_records)
+    with tracing.span("rank", queries=len(queries), sections=len(section_records), rows=len(section_embeddings)):
+        query_strings = [f"Persona: {p}. Job: {j}" for p, j in queries]
+        if index is None:
+            ranked = rank_sections_batch(query_embeddings, query_strings, section_records, section_embeddings, top_k,
+                                         owners, pooling)
+        else:
+            ranked = [rank_sections(q, query, section_records, section_embeddings, top_k, index=index,
+                                    chunk_owner=owners, pooling=pooling)
+                      for q, query in zip(query_embeddings, query_strings)]
+
+    inputs = [summary_inputs(sections, section_records, section_embeddings, q)
+              for sections, q in zip(ranked, query_embeddings)]
+    with tracing.span("summarize", queries=len(queries)) as span:
+        if getattr(summarizer, "query_dependent", False):
+            summaries = [summarizer.summarize_batch(texts, query_embedding=q)
+                         for texts, q in zip(inputs, query_embeddings)]
+            span.set(texts=sum(map(len, inputs)))
+        else:
+            unique = list(dict.fromkeys(text for texts in inputs for text in texts))
+            span.set(texts=len(unique), shared=sum(map(len, inputs)) - len(unique))
+            by_text = dict(zip(unique, summarizer.summarize_batch(unique)))
+            summaries = [[by_text[text] for text in texts] for texts in inputs]
+
+    results = []
+    for sections, query_summaries in zip(ranked, summaries):
+        results.append([{
+            "document": section["doc"],
+            "page_number": section["page"],
+            "section_title": section["heading"],
+            "importance_rank": rank,
+            "refined_text": summary
+        } for rank, (section, summary) in enumerate(zip(sections, query_summaries), 1)])
+    return results
+
+
+def build_output(documents, persona, job, top_sections):
+    """The output JSON for one case; documents is the list of input filenames."""
+    return {
+        "metadata": {
+            "documents": documents,
+            "persona": persona,
+            "job_to_be_done": job,
+            "processed_at": datetime.utcnow().isoformat() + "Z"
+        },
+        "extracted_sections": [
+            {
+                "document": s["document"],
+                "page_number": s["page_number"],
+                "section_title": s["section_title"],
+                "importance_rank": s["importance_rank"]
+            } for s in top_sections
+        ],
+        "subsection_analysis": [
+            {
+                "document": s["document"],
+                "page_number": s["page_number"],
+                "refined_text": s["refined_text"]
+            } for s in top_sections
+        ]
+    }
+
@@ -0,0 +1,146 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from src.chunking import pool_scores
+
+GENERIC_HEADINGS = {"introduction", "overview", "summary", "conclusion", "disclaimer", "preface", "foreword"}
+
+
+def tokenize(text):
+    return set(re.findall(r"\w+", text.lower()))
+
+
+@lru_cache(maxsize=65536)
+def _section_tokens(title, heading):
+    return frozenset(tokenize(title + " " + heading))
+
+
+def lexical_scores(query_tokens, sections):
+    """
+    Per-section keyword overlap (fraction of query tokens found in doc title +
+    heading) and generic-heading penalty. Sections sharing a doc and heading
+    are scored once.
+    """
+    overlap = np.empty(len(sections), dtype=np.float64)
+    penalty = np.empty(len(sections), dtype=np.float64)
+    seen = {}
+    for i, section in enumerate(sections):
+        key = (section.get("doc", ""), section.get("heading", ""))
+        values = seen.get(key)
+        if values is None:
+            values = seen[key] = (
+                len(query_tokens & _section_tokens(*key)),
+                -0.2 if key[1].lower().strip() in GENERIC_HEADINGS else 0.0,
+            )
+        overlap[i], penalty[i] = values
+    return overlap / max(1, len(query_tokens)), penalty
+
+
+def score_sections(query_embedding, query, sections, embeddings, chunk_owner=None, pooling="max"):
+    """
+    Hybrid score per section: 0.8 * cosine similarity + 0.1 * keyword overlap
+    + generic-heading penalty. Embeddings are expected to be L2-normalized,
+    so the similarity is a single matrix-vector product. With chunk_owner
+    (section index of each embedding row), chunk similarities are pooled
+    per section first.
+    """
+    if len(sections) == 0:
+        return np.empty(0, dtype=np.float64)
+    embeddings = np.asarray(embeddings)
+    emb_sim = (embeddings @ np.asarray(query_embedding, dtype=embeddings.dtype)).astype(np.float64)
+    if chunk_owner is not None:
+        emb_sim = pool_scores(emb_sim, chunk_owner, len(sections), pooling)
+    keyword_overlap, generic_penalty = lexical_scores(tokenize(query), sections)
+    return 0.8 * emb_sim + 0.1 * keyword_overlap + generic_penalty
+
+
+def score_sections_batch(query_embeddings, queries, sections, embeddings, chunk_owner=None, pooling="max"):
+    """
+    score_sections for many queries at once: a queries × sections matrix from
+    one matrix product. Keyword overlap is counted over the vocabulary of the
+    queries only, as a (queries × tokens) @ (tokens × headings) product.
+    """
+    query_embeddings = np.atleast_2d(query_embeddings)
+    if len(sections) == 0:
+        return np.empty((len(query_embeddings), 0), dtype=np.float64)
+    embeddings = np.asarray(embeddings)
+    emb_sim = (np.asarray(query_embeddings, dtype=embeddings.dtype) @ embeddings.T).astype(np.float64)
+    if chunk_owner is not None:
+        emb_sim = pool_scores(emb_sim, chunk_owner, len(sections), pooling)
+
+    query_tokens = [tokenize(query) for query in queries]
+    vocabulary = {token: j for j, token in enumerate(sorted(set().union(*query_tokens)))}
+    keys, key_of = {}, np.empty(len(sections), dtype=np.intp)
+    for i, section in enumerate(sections):
+        key = (section.get("doc", ""), section.get("heading", ""))
+        key_of[i] = keys.setdefault(key, len(keys))
+
+    heading_terms = np.zeros((len(vocabulary), len(keys)), dtype=np.float64)
+    penalty = np.empty(len(keys), dtype=np.float64)
+    for key, k in keys.items():
+        for token in _section_tokens(*key):
+            j = vocabulary.get(token)
+            if j is not None:
+                heading_terms[j, k] = 1.0
+        penalty[k] = -0.2 if key[1].lower().strip() in GENERIC_HEADINGS else 0.0
+    query_terms = np.zeros((len(queries), len(vocabulary)), dtype=np.float64)
+    for q, tokens in enumerate(query_tokens):
+        query_terms[q, [vocabulary[token] for token in tokens]] = 1.0
+    lengths = np.maximum(1, [len(tokens) for tokens in query_tokens])[:, None]
+    keyword_overlap = (query_terms @ heading_terms)[:, key_of] / lengths
+    return 0.8 * emb_sim + 0.1 * keyword_overlap + penalty[key_of]
+
+
+def top_k_indices(scores, k):
+    """
+    Indices of the k highest scores, best first. Equal scores keep input
+    order, matching a stable descending sort of the whole array.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= n:
+        candidates = np.arange(n)
+    else:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        kth = scores[candidates].min()
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        candidates = np.concatenate([above, ties])
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+def rank_sections(query_embedding, query, sections, embeddings, top_k=5, index=None, n_candidates=200, n_probe=None,
+                  chunk_owner=None, pooling="max"):
+    """
+    Top-k sections by hybrid score. With an ANN index (src.ann.IVFIndex built
+    over the same embeddings), only its n_candidates nearest sections are
+    re-scored instead of the whole corpus. With chunk_owner, embeddings hold
+    one row per chunk (see src.chunking) and the index is over chunks too.
+    """
+    if index is None:
+        scores = score_sections(query_embedding, query, sections, embeddings, chunk_owner, pooling)
+        return [sections[i] for i in top_k_indices(scores, top_k)]
+
+    candidate_ids, _ = index.search(query_embedding, max(n_candidates, top_k), n_probe=n_probe)
+    candidate_ids = np.sort(candidate_ids)  # ties keep corpus order, as in the exact path
+    if chunk_owner is None:
+        candidates = [sections[i] for i in candidate_ids]
+        scores = score_sections(query_embedding, query, candidates, np.asarray(embeddings[candidate_ids]))
+        return [candidates[i] for i in top_k_indices(scores, top_k)]
+
+    # re-score every chunk of the sections the candidate chunks belong to
+    section_ids = np.unique(chunk_owner[candidate_ids])
+    rows = np.flatnonzero(np.isin(chunk_owner, section_ids))
+    candidates = [sections[i] for i in section_ids]
+    owners = np.searchsorted(section_ids, chunk_owner[rows])
+    scores = score_sections(query_embedding, query, candidates, np.asarray(embeddings[rows]), owners, pooling)
+    return [candidates[i] for i in top_k_indices(scores, top_k)]
+
+
+def rank_sections_batch(query_embeddings, queries, sections, embeddings, top_k=5, chunk_owner=None, pooling="max"):
+    """rank_sections (exact path) for every query: one list of top-k sections per query."""
+    scores = score_sections_batch(query_embeddings, queries, sections, embeddings, chunk_owner, pooling)
+    return [[sections[i] for i in top_k_indices(row, top_k)] for row in scores]
@@ -0,0 +1,83 @@
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src import tracing
+from src.cache import OutlineCache, file_hash
+from src.extract import extract_outline
+from src.streaming import extract_outline_streaming
+
+
+def document_sections(filepath, filename, min_chars=50, cache_dir=None, streaming=False, pdf_hash=None):
+    with tracing.span("document", doc=filename, streaming=streaming):
+        return _document_sections(filepath, filename, min_chars, cache_dir, streaming, pdf_hash)
+
+
+def _document_sections(filepath, filename, min_chars, cache_dir, streaming, pdf_hash):
+    pdf_hash = pdf_hash or file_hash(filepath)
+    if cache_dir:
+        outline_data = OutlineCache(cache_dir).get_or_extract(filepath, pdf_hash=pdf_hash, streaming=streaming)
+    elif streaming:
+        outline_data = extract_outline_streaming(filepath)
+    else:
+        outline_data = extract_outline(filepath)
+    if tracing.debug_enabled():
+        print(f"[DEBUG] Outline for {filename}:", json.dumps(outline_data, indent=2))
+    return outline_records(outline_data, filename, pdf_hash, min_chars)
+
+
+def outline_records(outline_data, filename, pdf_hash, min_chars=50):
+    """Section records ({doc, doc_hash, page, heading, text}) for the outline entries with enough text."""
+    records = []
+    for section in outline_data.get("outline", []):
+        section_text = section.get("section_text", "")
+        if not section_text or len(section_text) < min_chars:
+            continue
+
+        records.append({
+            "doc": filename,
+            "doc_hash": pdf_hash,
+            "page": section["page"],
+            "heading": section["text"],
+            "text": section_text
+        })
+    return records
+
+
+def iter_document_sections(documents, workers=1, cache_dir=None, streaming=False, hashes=None):
+    """
+    documents: list of (filepath, filename) pairs; hashes, when given, holds
+    their content hashes in the same order so they are not computed again.
+    Yields (index, records, error) as each document finishes, in completion order.
+    A failing document yields its exception instead of stopping the others.
+    """
+    hashes = hashes or [None] * len(documents)
+    yield from _iter_document_sections(documents, workers, cache_dir, streaming, hashes)
+    if cache_dir:
+        OutlineCache(cache_dir).evict()
+
+
+def _iter_document_sections(documents, workers, cache_dir, streaming, hashes):
+    if workers <= 1 or len(documents) <= 1:
+        for idx, (filepath, filename) in enumerate(documents):
+            try:
+                yield idx, document_sections(filepath, filename, cache_dir=cache_dir, streaming=streaming,
+                                             pdf_hash=hashes[idx]), None
+            except Exception as e:
+                yield idx, [], e
+        return
+
+    # spawn keeps workers free of whatever model threads the parent has started
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(documents)), mp_context=context) as pool:
+        futures = {
+            pool.submit(document_sections, filepath, filename, cache_dir=cache_dir, streaming=streaming,
+                        pdf_hash=hashes[idx]): idx
+            for idx, (filepath, filename) in enumerate(documents)
+        }
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                yield idx, future.result(), None
+            except Exception as e:
+                yield idx, [], e
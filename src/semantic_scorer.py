@@ -1,31 +1,65 @@
 import os
 import json
+from collections import OrderedDict
 import torch
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
+from src.ranking import top_k_indices
+from src.vector_store import text_key
 
 class SectionRanker:
-    def __init__(self, model_path='models/all-MiniLM-L6-v2'):
+    def __init__(self, model_path='models/all-MiniLM-L6-v2', cache_size=65536):
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
         self.model = SentenceTransformer(model_path, device=self.device)
+        # paragraph embeddings by text hash (LRU) and the last query's embedding
+        self.cache_size = cache_size
+        self._paragraphs = OrderedDict()
+        self._query = (None, None)
 
     def embed_text(self, texts):
         return self.model.encode(texts, convert_to_tensor=True)
 
+    def embed_normalized(self, texts):
+        """Unit-length numpy embeddings, so a dot product is the cosine similarity."""
+        return self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+    def query_embedding(self, persona, job):
+        query_text = f"Persona: {persona}\nTask: {job}"
+        if self._query[0] != query_text:
+            self._query = (query_text, self.embed_normalized([query_text])[0])
+        return self._query[1]
+
+    def paragraph_embeddings(self, paragraphs):
+        """One row per paragraph; only paragraphs not in the cache are encoded, all in one batch."""
+        keys = [text_key(p) for p in paragraphs]
+        missing = {}
+        for key, paragraph in zip(keys, paragraphs):
+            if key not in self._paragraphs:
+                missing.setdefault(key, paragraph)
+        if missing:
+            for key, row in zip(missing, self.embed_normalized(list(missing.values()))):
+                self._paragraphs[key] = row
+        rows = []
+        for key in keys:
+            self._paragraphs.move_to_end(key)
+            rows.append(self._paragraphs[key])
+        while len(self._paragraphs) > self.cache_size:
+            self._paragraphs.popitem(last=False)
+        return np.stack(rows) if rows else np.empty((0, self.model.get_sentence_embedding_dimension()), np.float32)
+
     def rank_sections(self, persona, job, sections):
         """
         sections: list of dicts with keys: {document, page_number, section_title, content}
         Returns the same list, ranked by importance.
         """
-        # 1. Embed context (persona + job)
-        query_text = f"Persona: {persona}\nTask: {job}"
-        query_embedding = self.embed_text([query_text])[0]
+        # 1. Embed context (persona + job); rank_subsections reuses it
+        query_embedding = self.query_embedding(persona, job)
 
         # 2. Embed all sections
-        section_embeddings = self.embed_text([s['content'] for s in sections])
+        section_embeddings = self.embed_normalized([s['content'] for s in sections])
 
         # 3. Compute cosine similarities
-        similarities = util.cos_sim(query_embedding, section_embeddings)[0].cpu().numpy()
+        similarities = section_embeddings @ query_embedding
 
         # 4. Rank sections
         ranked_sections = []
@@ -43,27 +77,31 @@ class SectionRanker:
 
         return ranked_sections
 
-    def rank_subsections(self, persona, job, ranked_sections, top_k=5):
+    def rank_subsections(self, persona, job, ranked_sections, top_k=5, per_section=3, query_embedding=None):
         """
         Returns refined, ranked subsection analysis from top-ranked sections.
+        The paragraphs of all top sections are embedded in one batch; offsets
+        map the scores back to their section.
         """
-        query_text = f"Persona: {persona}\nTask: {job}"
-        query_embedding = self.embed_text([query_text])[0]
+        if query_embedding is None:
+            query_embedding = self.query_embedding(persona, job)
 
-        subsection_analysis = []
+        sections, paragraphs, offsets = [], [], [0]
         for section in ranked_sections[:top_k]:
-            content = section['content']
-            paragraphs = [p.strip() for p in content.split('\n') if len(p.strip()) > 50]
-
-            if not paragraphs:
+            section_paragraphs = [p.strip() for p in section['content'].split('\n') if len(p.strip()) > 50]
+            if not section_paragraphs:
                 continue
+            sections.append(section)
+            paragraphs.extend(section_paragraphs)
+            offsets.append(len(paragraphs))
+        if not paragraphs:
+            return []
 
-            para_embeddings = self.embed_text(paragraphs)
-            sims = util.cos_sim(query_embedding, para_embeddings)[0].cpu().numpy()
+        sims = self.paragraph_embeddings(paragraphs) @ np.asarray(query_embedding, dtype=np.float32)
 
-            top_indices = np.argsort(sims)[::-1][:3]  # Top 3 relevant paragraphs
-
-            for idx in top_indices:
+        subsection_analysis = []
+        for section, start, end in zip(sections, offsets, offsets[1:]):
+            for idx in top_k_indices(sims[start:end], per_section) + start:  # Top 3 relevant paragraphs
                 subsection_analysis.append({
                     "document": section['document'],
                     "page_number": section['page_number'],
@@ -0,0 +1,303 @@
+"""
+Long-running HTTP/JSON service that keeps models, outlines and embeddings warm.
+
+    GET  /health   {"status": "ok", "documents": n, "sections": m, "batching": {...}}
+    POST /ingest   {"paths": [...]} and/or {"pdf_dir": "..."}   (under the server's ingest root)
+    POST /query    {"persona": "...", "job": "...", "documents": [...]}  (documents optional)
+
+Documents are identified by their absolute path; /query also accepts a
+bare filename when only one ingested document has it. Relative paths are
+taken from the ingest root.
+
+/query answers with the same JSON main.py writes per case. Model calls and
+ingestion run in thread pools so the event loop keeps serving other
+requests; ingestion has its own pool so a large upload does not hold up
+queries.
+"""
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import numpy as np
+
+from src import tracing
+from src.cache import file_hash
+from src.chunking import Chunker
+from src.pipeline import build_ann_index, build_output, embed_records, rank_and_summarize
+from src.sections import iter_document_sections
+from src.vector_store import EmbeddingStore
+
+MAX_BODY = 1 << 20
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def string_list(request, key, default):
+    """request[key] checked to be a list of strings (default when absent); 400 otherwise."""
+    value = request.get(key, default)
+    if value is default:
+        return value
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"'{key}' must be a list of strings")
+    return value
+
+
+class Corpus:
+    """
+    Section records and embeddings of every ingested document, keyed by
+    absolute path (the filename is only for display). With ann_probe,
+    queries over the whole corpus go through an IVF index built with the
+    concatenation (see build_ann_index).
+    """
+
+    def __init__(self, ann_probe=0):
+        self._docs = {}  # absolute path -> (doc_hash, records, embeddings)
+        self._lock = threading.Lock()
+        self.ann_probe = ann_probe
+        self._all = None  # concatenation (and index) over every document, rebuilt after a change
+
+    def __len__(self):
+        return len(self._docs)
+
+    def hash_of(self, path):
+        entry = self._docs.get(path)
+        return entry[0] if entry else None
+
+    def add(self, path, doc_hash, records, embeddings):
+        with self._lock:
+            self._docs[path] = (doc_hash, records, embeddings)
+            self._all = None
+
+    def resolve(self, documents, root):
+        """Ingested paths for /query's documents: paths (relative to root) or filenames only one document has."""
+        with self._lock:
+            paths, missing = [], []
+            for document in documents:
+                path = os.path.realpath(os.path.join(root, document))
+                if path not in self._docs:
+                    matches = [p for p in self._docs if os.path.basename(p) == document]
+                    if len(matches) > 1:
+                        raise HTTPError(HTTPStatus.BAD_REQUEST,
+                                        f"{document} is ambiguous, give its path: {', '.join(sorted(matches))}")
+                    if not matches:
+                        missing.append(document)
+                        continue
+                    path = matches[0]
+                paths.append(path)
+        if missing:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"not ingested: {', '.join(missing)}")
+        return paths
+
+    def section_count(self):
+        with self._lock:
+            return sum(len(records) for _, records, _ in self._docs.values())
+
+    def select(self, paths=None):
+        """
+        (filenames, records, embeddings, index) for the given resolved paths,
+        or for every document. index is None (exact search) unless the whole
+        corpus is selected.
+        """
+        with self._lock:
+            if paths is None:
+                if self._all is None:
+                    names, records, embeddings = self._concat(list(self._docs))
+                    self._all = names, records, embeddings, build_ann_index(embeddings, self.ann_probe)
+                return self._all
+            return (*self._concat(paths), None)
+
+    def _concat(self, paths):
+        records, embeddings = [], []
+        for path in paths:
+            _, doc_records, doc_embeddings = self._docs[path]
+            if doc_records:
+                records.extend(doc_records)
+                embeddings.append(doc_embeddings)
+        filenames = [os.path.basename(path) for path in paths]
+        return filenames, records, (np.concatenate(embeddings) if embeddings else None)
+
+
+class ScrybeServer:
+    def __init__(self, models, workers=1, cache_dir=None, embeddings_dir=None, streaming=False, threads=2,
+                 chunk_tokens=256, chunk_overlap=32, pooling="max", ann_probe=0, ingest_root="."):
+        self.models = models
+        # /ingest only reads PDFs under this directory
+        self.ingest_root = os.path.realpath(ingest_root)
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        self.pooling = pooling
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.embeddings_dir = embeddings_dir
+        self.streaming = streaming
+        self.corpus = Corpus(ann_probe)
+        self._query_pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="query")
+        self._ingest_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+
+    # --- work run in the executors -------------------------------------------------
+
+    def ingest(self, paths):
+        """Extracts, embeds and adds every PDF in paths whose content is not already in the corpus."""
+        pending, hashes, unchanged = [], [], []
+        for path in paths:
+            if not os.path.isfile(path):
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"file not found: {path}")
+            path = os.path.realpath(path)
+            pdf_hash = file_hash(path)
+            if self.corpus.hash_of(path) == pdf_hash:
+                unchanged.append({"document": os.path.basename(path), "path": path})
+            else:
+                pending.append((path, os.path.basename(path)))
+                hashes.append(pdf_hash)
+
+        embedder = self.models.embedder
+        chunker = Chunker.for_embedder(embedder, self.chunk_tokens, self.chunk_overlap) if self.chunk_tokens else None
+        store = EmbeddingStore(self.embeddings_dir, embedder.model_id) if self.embeddings_dir else None
+        ingested, failed = [], []
+        for idx, records, error in iter_document_sections(pending, workers=self.workers, cache_dir=self.cache_dir,
+                                                          streaming=self.streaming, hashes=hashes):
+            path, filename = pending[idx]
+            if error is not None:
+                print(f"[!] Failed to extract {path}: {error}")
+                failed.append({"document": filename, "path": path, "error": str(error)})
+                continue
+            embeddings = embed_records(embedder, records, store, chunker) if records else None
+            self.corpus.add(path, hashes[idx], records, embeddings)
+            ingested.append({"document": filename, "path": path, "sections": len(records)})
+        return {"ingested": ingested, "unchanged": unchanged, "failed": failed}
+
+    def query(self, persona, job, documents=None):
+        paths = None if documents is None else self.corpus.resolve(documents, self.ingest_root)
+        filenames, records, embeddings, index = self.corpus.select(paths)
+        if not records:
+            raise HTTPError(HTTPStatus.CONFLICT, "no sections ingested")
+        with tracing.span("query", documents=len(filenames), sections=len(records)):
+            top_sections = rank_and_summarize(self.models.embedder, self.models.summarizer, persona, job,
+                                              records, embeddings, pooling=self.pooling, index=index)
+        return build_output(filenames, persona, job, top_sections)
+
+    # --- HTTP ------------------------------------------------------------------------
+
+    async def _dispatch(self, method, path, body):
+        loop = asyncio.get_running_loop()
+        if path == "/health":
+            if method != "GET":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "use GET")
+            health = {"status": "ok", "documents": len(self.corpus), "sections": self.corpus.section_count()}
+            stats = getattr(self.models, "stats", None)
+            if stats is not None:
+                health["batching"] = stats()
+            return health
+
+        if path not in ("/ingest", "/query"):
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"no route for {path}")
+        if method != "POST":
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "use POST")
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {e}")
+        if not isinstance(request, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "expected a JSON object")
+
+        if path == "/ingest":
+            paths = [self._under_root(p) for p in string_list(request, "paths", [])]
+            pdf_dir = request.get("pdf_dir")
+            if pdf_dir is not None and not isinstance(pdf_dir, str):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "'pdf_dir' must be a string")
+            if pdf_dir:
+                pdf_dir = self._under_root(pdf_dir)
+                if not os.path.isdir(pdf_dir):
+                    raise HTTPError(HTTPStatus.NOT_FOUND, f"directory not found: {pdf_dir}")
+                paths += [os.path.join(pdf_dir, f) for f in sorted(os.listdir(pdf_dir)) if f.lower().endswith(".pdf")]
+            if not paths:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "give 'paths' or 'pdf_dir'")
+            return await loop.run_in_executor(self._ingest_pool, self.ingest, paths)
+
+        persona, job = request.get("persona"), request.get("job")
+        if not isinstance(persona, str) or not isinstance(job, str) or not persona or not job:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "'persona' and 'job' are required strings")
+        documents = string_list(request, "documents", None)
+        return await loop.run_in_executor(self._query_pool, self.query, persona, job, documents)
+
+    def _under_root(self, path):
+        """path resolved against the ingest root; 403 when it points outside of it."""
+        resolved = os.path.realpath(os.path.join(self.ingest_root, path))
+        if os.path.commonpath([self.ingest_root, resolved]) != self.ingest_root:
+            raise HTTPError(HTTPStatus.FORBIDDEN, f"outside the ingest root: {path}")
+        return resolved
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                if length < 0:
+                    # the body cannot be skipped without its length, so the connection ends here
+                    status, payload, keep_alive = HTTPStatus.BAD_REQUEST, {"error": "invalid Content-Length"}, False
+                elif length > MAX_BODY:
+                    status, payload, keep_alive = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "body too large"}, False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self._respond(method, target.split("?", 1)[0], body)
+
+                self._write(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method, path, body):
+        try:
+            return HTTPStatus.OK, await self._dispatch(method, path, body)
+        except HTTPError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            print(f"[!] {method} {path} failed: {e!r}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+
+    @staticmethod
+    def _write(writer, status, payload, keep_alive):
+        body = json.dumps(payload, indent=2).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        server = await asyncio.start_server(self._handle, host, port)
+        print(f"[✓] Serving on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self._query_pool.shutdown(wait=False)
+        self._ingest_pool.shutdown(wait=False)
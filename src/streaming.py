@@ -0,0 +1,351 @@
+"""
+Bounded-memory outline extraction for very large PDFs.
+
+extract_outline holds every line of the document (plus merged and cleaned
+copies) in memory. This module applies the same heuristics page by page:
+
+  pass 1  streams merged blocks once to collect font statistics: the body
+          font, and for every (font size, follower threshold) pair how often
+          and where it first occurs. That is enough to know which sizes
+          survive the follower filter, and so the title/H1/H2 fonts and the
+          title itself, without keeping any block.
+  pass 2  streams the document again, detects headings on each page with a
+          few blocks of context on either side, and yields outline entries
+          with their section_text as soon as the next heading closes them.
+
+Memory is bounded by a couple of pages plus the text of open sections. A
+bold line ending a page and a long paragraph opening the next one keep both
+pages until the bold-candidate pass can see them together.
+Table detection and line merging only ever look within a page, so the
+result is the same outline extract_outline returns.
+"""
+from collections import Counter, deque
+
+from src import tracing
+from src.blockstore import BlockStoreBuilder
+from src.extract import (
+    DOTS_ONLY,
+    ENDS_IN_DIGIT,
+    WHITESPACE_RUN,
+    add_page_lines,
+    determine_heading_level,
+    is_duplicate_title,
+    merge_blocks,
+    normalize,
+    remove_table_blocks,
+    text_features,
+)
+from src.pdfdoc import PdfDocument
+
+NO_FOLLOWER = float("-inf")
+
+# determine_heading_level reads one block either side; the bold-candidate
+# fallback looks up to three blocks back, so four blocks of history suffice.
+HISTORY = 4
+
+
+def iter_page_stores(pdf_path):
+    """Yields (page_num, BlockStore) one page at a time; block ids stay global."""
+    doc = PdfDocument(pdf_path)
+    try:
+        next_id = 0
+        for page_num, text_dict in doc.iter_text_dicts():
+            builder = BlockStoreBuilder(start_id=next_id)
+            add_page_lines(builder, text_dict, page_num)
+            next_id = builder.next_id
+            yield page_num, builder.build()
+    finally:
+        doc.close()
+
+
+def iter_merged_blocks(pdf_path):
+    for _, store in iter_page_stores(pdf_path):
+        # merging never crosses a page, so merging page by page is exact
+        yield from merge_blocks(remove_table_blocks(store)).rows()
+
+
+def _follower_threshold(first, second):
+    """
+    has_good_follower(i) is True exactly when body_font <= this value, given
+    the (up to) two blocks following block i.
+    """
+    if first is None or text_features(first["text"]).decorative:
+        return NO_FOLLOWER
+    threshold = first["font_size"]
+    if second is not None and not text_features(second["text"]).decorative:
+        threshold = max(threshold, second["font_size"])
+    return threshold
+
+
+def iter_blocks_with_threshold(pdf_path):
+    window = deque()
+    for block in iter_merged_blocks(pdf_path):
+        window.append(block)
+        if len(window) == 3:
+            yield window[0], _follower_threshold(window[1], window[2])
+            window.popleft()
+    while window:
+        first = window[1] if len(window) > 1 else None
+        second = window[2] if len(window) > 2 else None
+        yield window[0], _follower_threshold(first, second)
+        window.popleft()
+
+
+def _is_kept(size, threshold, body_font):
+    return size < body_font or body_font <= threshold
+
+
+class FontStats:
+    """Pass 1: everything build_outline derives from font sizes, without keeping blocks."""
+
+    def __init__(self, pdf_path):
+        font_counter = Counter()
+        first_seen = {}  # (size, threshold) -> (merged position, text, page)
+        for pos, (block, threshold) in enumerate(iter_blocks_with_threshold(pdf_path)):
+            size = block["font_size"]
+            font_counter[size] += 1
+            first_seen.setdefault((size, threshold), (pos, block["text"], block["page"]))
+
+        self.empty = not font_counter
+        if self.empty:
+            return
+
+        self.body_font = font_counter.most_common(1)[0][0]
+        kept = {key: seen for key, seen in first_seen.items() if _is_kept(key[0], key[1], self.body_font)}
+        font_ranks = sorted({size for size, _ in kept}, reverse=True)
+
+        self.title_font = font_ranks[0]
+        self.h1_font = font_ranks[1] if len(font_ranks) > 1 else self.title_font
+        self.h2_font = font_ranks[2] if len(font_ranks) > 2 else self.h1_font
+        self.skip_outline = self.h1_font == self.h2_font
+
+        title_pos, self.title, self.title_page = min(
+            seen for (size, _), seen in kept.items() if size == self.title_font
+        )
+        self.title_pos = title_pos
+        heading_fonts = {self.h1_font, self.h2_font}
+        self.earlier_h1_h2 = any(
+            seen[0] < title_pos for (size, _), seen in kept.items() if size in heading_fonts
+        )
+
+    def levels(self, i, blocks):
+        return determine_heading_level(i, blocks, self.body_font, self.h1_font, self.h2_font)
+
+
+def iter_cleaned_pages(pdf_path, stats):
+    """Pass 2: yields (page_num, cleaned blocks) with each block's global cleaned position in "pos"."""
+    pos = 0
+    page, current = None, []
+    for merged_pos, (block, threshold) in enumerate(iter_blocks_with_threshold(pdf_path)):
+        if not _is_kept(block["font_size"], threshold, stats.body_font):
+            continue
+        block["pos"] = pos
+        block["is_title"] = merged_pos == stats.title_pos
+        pos += 1
+        if block["page"] != page and current:
+            yield page, current
+            current = []
+        page = block["page"]
+        current.append(block)
+    if current:
+        yield page, current
+
+
+class _Section:
+    __slots__ = ("entry", "start", "end", "pieces")
+
+    def __init__(self, entry, start):
+        self.entry = entry
+        self.start = start
+        self.end = None  # None: next heading not seen yet
+        self.pieces = []
+
+    def accepts(self, pos):
+        return pos > self.start and (self.end is None or pos < self.end)
+
+
+class _OutlineStream:
+    def __init__(self, stats):
+        self.stats = stats
+        self.history = deque(maxlen=HISTORY)
+        self.pending = {}      # page -> (cleaned blocks, outline entries, keys)
+        self.deferred = []     # blocks still waiting for the bold-candidate pass, after `lead` that are done
+        self.lead = 0
+        self.sections = deque()
+        self.last_end = None   # section waiting for the next heading's position
+
+    def _detect(self, page, blocks, lookahead):
+        stats = self.stats
+        context = list(self.history) + blocks + ([lookahead] if lookahead else [])
+        offset = len(self.history)
+        entries, keys = [], set()
+        self.pending[page] = (blocks, entries, keys)
+
+        for k, block in enumerate(blocks):
+            text = block["text"]
+            if block["is_title"] or stats.skip_outline:
+                continue
+            level = stats.levels(offset + k, context)
+            if level:
+                if DOTS_ONLY.fullmatch(text):
+                    continue
+                if ENDS_IN_DIGIT.search(text):
+                    continue
+                key = (text.lower(), page)
+                if key not in keys:
+                    keys.add(key)
+                    entries.append({"level": level, "text": text, "page": page})
+
+        self.history.extend(blocks)
+        self.deferred.extend(blocks)
+
+    @staticmethod
+    def _is_anchor(block):
+        features = text_features(block["text"])
+        return features.words >= 15 or features.bullets_only
+
+    @staticmethod
+    def _may_pick(anchor, candidate):
+        """The tests of a bold candidate that do not depend on the outline found so far."""
+        return (
+            text_features(candidate["text"]).words <= 10 and
+            "bold" in candidate["font_name"].lower() and
+            abs(anchor["y0"] - candidate["y1"]) > 10
+        )
+
+    def _cut(self):
+        """
+        End of the deferred blocks the bold-candidate pass can run over now:
+        the last page break that no anchor after it reaches back across to a
+        possible candidate, so nothing later can change what it finds.
+        """
+        blocks = self.deferred
+        cut = None
+        for e in range(self.lead, len(blocks) - 3):
+            if blocks[e]["page"] == blocks[e + 1]["page"]:
+                continue
+            if not any(self._is_anchor(blocks[i]) and
+                       any(self._may_pick(blocks[i], blocks[j]) for j in range(max(i - 3, 0), e + 1))
+                       for i in range(e + 1, e + 4)):
+                cut = e + 1
+        return cut
+
+    def _bold_pass(self, end):
+        """
+        build_outline's bold short lines right above long paragraphs or
+        bulleted lists, over deferred[lead:end] and in its order: last anchor
+        first, so candidates land in each page's entries as they do there.
+        Then the pages of those blocks are complete.
+        """
+        stats, context = self.stats, self.deferred
+        for i in reversed(range(self.lead, end)):
+            block = context[i]
+            page = block["page"]
+            if not self._is_anchor(block) or (block["text"].lower(), page) in self.pending[page][2]:
+                continue
+            for j in range(i - 1, max(i - 4, -1), -1):
+                candidate = context[j]
+                cand_text = candidate["text"]
+                cand_page = candidate["page"]
+                cand_pending = self.pending.get(cand_page)
+                if cand_pending is None:
+                    break
+                cand_keys = cand_pending[2]
+                if self._may_pick(block, candidate) and (cand_text.lower(), cand_page) not in cand_keys:
+                    level = stats.levels(j, context)
+                    if level:
+                        cand_pending[1].append({"level": level, "text": cand_text, "page": cand_page})
+                        cand_keys.add((cand_text.lower(), cand_page))
+                    break
+
+        pages = sorted({b["page"] for b in context[self.lead:end]})
+        keep = max(end - HISTORY, 0)
+        self.deferred = context[keep:]
+        self.lead = end - keep
+        for page in pages:
+            self._finalize(page)
+
+    def _finalize(self, page):
+        blocks, entries, _ = self.pending.pop(page)
+        entries = [e for e in entries if not is_duplicate_title(e["text"], self.stats.title)]
+
+        first_exact, first_normalized = {}, {}
+        for b in blocks:
+            first_exact.setdefault(b["text"], b)
+            first_normalized.setdefault(normalize(b["text"]), b)
+        entries.sort(key=lambda e: first_exact[e["text"]]["y0"] if e["text"] in first_exact else 0.0)
+
+        for entry in entries:
+            exact = first_exact.get(entry["text"])
+            if self.last_end is not None:
+                # a heading that cannot be located leaves the previous section open to the end
+                self.last_end.end = exact["pos"] if exact else float("inf")
+            start = first_normalized.get(normalize(entry["text"]))
+            if start is None:
+                self.last_end = None
+                continue
+            section = _Section(entry, start["pos"])
+            self.sections.append(section)
+            self.last_end = section
+
+        for b in blocks:
+            text = b["text"].strip()
+            if not text:
+                continue
+            for section in self.sections:
+                if section.accepts(b["pos"]):
+                    section.pieces.append(text)
+
+    def _ready(self, next_pos):
+        while self.sections:
+            section = self.sections[0]
+            if next_pos is not None and (section.end is None or section.end > next_pos):
+                break
+            self.sections.popleft()
+            section_text = WHITESPACE_RUN.sub(' ', " ".join(section.pieces)).strip()
+            yield {**section.entry, "section_text": section_text}
+
+    def run(self, pages):
+        # each page is held back until the next one arrives, for determine_heading_level's lookahead
+        held = None
+        for page, blocks in pages:
+            if held is not None:
+                self._detect(held[0], held[1], blocks[0])
+                yield from self._flush()
+            held = (page, blocks)
+        if held is not None:
+            self._detect(held[0], held[1], None)
+        self._bold_pass(len(self.deferred))
+        yield from self._ready(None)
+
+    def _flush(self):
+        end = self._cut()
+        if end is not None:
+            self._bold_pass(end)
+        next_pos = min(blocks[0]["pos"] for blocks, _, _ in self.pending.values())
+        yield from self._ready(next_pos)
+
+
+def stream_outline(pdf_path):
+    """
+    Returns (title, entries) where entries lazily yields outline entries
+    ({"level", "text", "page", "section_text"}) in document order.
+    """
+    stats = FontStats(pdf_path)
+    if stats.empty:
+        return "", iter(())
+
+    h1_h2_are_body = stats.h1_font == stats.h2_font == stats.body_font
+    if stats.earlier_h1_h2 and not h1_h2_are_body:
+        return "", iter([{"level": "H1", "text": stats.title, "page": stats.title_page}])
+
+    return stats.title, _OutlineStream(stats).run(iter_cleaned_pages(pdf_path, stats))
+
+
+def extract_outline_streaming(pdf_path):
+    with tracing.span("extract.stream") as span:
+        title, entries = stream_outline(pdf_path)
+        outline = list(entries)
+        span.set(sections=len(outline))
+    tracing.count("sections", len(outline))
+    return {"title": title, "outline": outline}
@@ -1,38 +1,68 @@
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 import torch
 import os
+from src import tracing
+from src.backends import SUMMARY_BACKENDS, quantize_dynamic
 
 class Summarizer:
     
-    def __init__(self, model_dir="models/summary_model", device="cpu"):
+    def __init__(self, model_dir="models/summary_model", device="cpu", backend="torch"):
         assert os.path.exists(model_dir), f"Local model dir '{model_dir}' not found"
+        if backend not in SUMMARY_BACKENDS:
+            raise ValueError(f"Unknown summary backend {backend!r}; expected one of {', '.join(SUMMARY_BACKENDS)}")
         self.tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
         self.model = AutoModelForSeq2SeqLM.from_pretrained(model_dir, local_files_only=True)
+        self.backend = backend
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        if backend == "int8":
+            # dynamically quantized Linear layers run on CPU only
+            self.device = "cpu"
+            self.model = quantize_dynamic(self.model)
         self.model.to(self.device)
 
 
-    def summarize(self, text: str, max_length=120, min_length=30) -> str:
-        if not text or len(text.strip()) < 50:
-            return text.strip()
+    def summarize(self, text: str, max_length=120, min_length=30, query_embedding=None) -> str:
+        return self.summarize_batch([text], max_length=max_length, min_length=min_length)[0]
 
-        
-        input_text = "summarize: " + text.strip()
-        inputs = self.tokenizer.encode(
-            input_text, return_tensors="pt", truncation=True, max_length=1000
-        ).to(self.device)
+    def summarize_batch(self, texts: list[str], max_length=120, min_length=30, batch_size=8,
+                        query_embedding=None) -> list[str]:
+        # query_embedding is accepted for interface parity with ExtractiveSummarizer;
+        # abstractive summaries do not depend on the query
+        summaries = [None] * len(texts)
+        encoded = {}
+        for i, text in enumerate(texts):
+            if not text or len(text.strip()) < 50:
+                summaries[i] = text.strip()
+                continue
+            encoded[i] = self.tokenizer.encode(
+                "summarize: " + text.strip(), truncation=True, max_length=1000
+            )
 
-        summary_ids = self.model.generate(
-            inputs,
-            max_length=max_length,
-            min_length=min_length,
-            length_penalty=2.0,
-            num_beams=4,
-            early_stopping=True,
-        )
+        tracing.count("summary.input_tokens", sum(len(ids) for ids in encoded.values()))
 
-        summary = self.tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-        return summary.strip()
+        # Bucket by token length so each batch pads to roughly its own size
+        order = sorted(encoded, key=lambda i: len(encoded[i]))
+        for start in range(0, len(order), batch_size):
+            chunk = order[start:start + batch_size]
+            inputs = self.tokenizer.pad(
+                {"input_ids": [encoded[i] for i in chunk]}, return_tensors="pt"
+            ).to(self.device)
+
+            with torch.no_grad():
+                summary_ids = self.model.generate(
+                    **inputs,
+                    max_length=max_length,
+                    min_length=min_length,
+                    length_penalty=2.0,
+                    num_beams=4,
+                    early_stopping=True,
+                )
+
+            decoded = self.tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+            for i, summary in zip(chunk, decoded):
+                summaries[i] = summary.strip()
+
+        return summaries
 
 
 # Example usage
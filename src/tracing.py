@@ -0,0 +1,173 @@
+"""
+Lightweight spans and counters, exported as JSON lines.
+
+Disabled by default: span() then hands back one shared no-op object and
+count() returns after a None check, so instrumented code costs next to
+nothing. configure(path) turns tracing on for this process and, through
+environment variables, for worker processes spawned afterwards. Every
+process appends its own lines to the same file:
+
+  {"type": "span", "name": "extract.headings", "start": 1700000000.123,
+   "duration_ms": 4.2, "pid": 123, "thread": "MainThread", "parent": "document",
+   "attrs": {...}}
+  {"type": "counters", "pid": 123, "root": "document", "counters": {"blocks": 812}}
+
+Counters are written as deltas each time a top-level span closes, so
+totals are the sum over all "counters" lines. configure(debug=True)
+enables the [DEBUG] output that used to be printed unconditionally.
+"""
+import json
+import os
+import threading
+import time
+
+TRACE_ENV = "SCRYBE_TRACE"
+DEBUG_ENV = "SCRYBE_DEBUG"
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "attrs", "parent", "start", "t0")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.start = time.time()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.t0
+        self.tracer._stack().pop()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer._finish(self, duration)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    def __init__(self, path=None, debug=False):
+        self.path = path
+        self.debug = debug
+        self.counters = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8", buffering=1) if path else None
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name, **attrs):
+        if self._file is None:
+            return NULL_SPAN
+        return _Span(self, name, attrs)
+
+    def count(self, name, n=1):
+        if self._file is None:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def _write(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            # one write per line; O_APPEND keeps lines from different processes whole
+            self._file.write(line)
+
+    def _finish(self, span, duration):
+        self._write({
+            "type": "span",
+            "name": span.name,
+            "start": round(span.start, 6),
+            "duration_ms": round(duration * 1000, 3),
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+            "parent": span.parent,
+            "attrs": span.attrs,
+        })
+        if span.parent is None:
+            self.flush_counters(root=span.name)
+
+    def flush_counters(self, root=None):
+        with self._lock:
+            counters, self.counters = self.counters, {}
+        if counters and self._file is not None:
+            self._write({"type": "counters", "pid": os.getpid(), "root": root, "counters": counters})
+
+    def close(self):
+        self.flush_counters()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_tracer = None
+
+
+def configure(path=None, debug=False):
+    """Enables tracing to path (JSON lines) and/or debug output; configure() with no arguments disables both."""
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+    _tracer = Tracer(path, debug) if (path or debug) else None
+    for key, value in ((TRACE_ENV, path), (DEBUG_ENV, "1" if debug else None)):
+        if value:
+            os.environ[key] = os.path.abspath(value) if key == TRACE_ENV else value
+        else:
+            os.environ.pop(key, None)
+    return _tracer
+
+
+def span(name, **attrs):
+    tracer = _tracer
+    if tracer is None:
+        return NULL_SPAN
+    return tracer.span(name, **attrs)
+
+
+def count(name, n=1):
+    tracer = _tracer
+    if tracer is not None:
+        tracer.count(name, n)
+
+
+def debug_enabled():
+    tracer = _tracer
+    return tracer is not None and tracer.debug
+
+
+def debug(*args):
+    if debug_enabled():
+        print("[DEBUG]", *args)
+
+
+if os.environ.get(TRACE_ENV) or os.environ.get(DEBUG_ENV):
+    # spawned workers inherit the parent's settings through the environment
+    configure(os.environ.get(TRACE_ENV), bool(os.environ.get(DEBUG_ENV)))
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+import numpy as np
+
+from src.cache import atomic_write_bytes
+
+
+def text_key(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Section embeddings on disk, one .npy matrix per document with a sidecar
+    .json listing the text hash of every row, grouped by model id.
+    Matrices are opened memory-mapped; only texts missing from the sidecar
+    are sent to the encoder.
+    """
+
+    def __init__(self, store_dir="cache/embeddings", model_id="embedding_model", dtype="float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        self.dtype = np.dtype(dtype)
+        self.root = os.path.join(store_dir, re.sub(r"[^\w.-]+", "_", model_id), dtype)
+
+    def _paths(self, doc_hash):
+        base = os.path.join(self.root, doc_hash[:2], doc_hash)
+        return base + ".npy", base + ".json"
+
+    def load(self, doc_hash):
+        """Returns (memory-mapped matrix, {text_key: row}) or (None, {}) when nothing usable is stored."""
+        matrix_path, meta_path = self._paths(doc_hash)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                keys = json.load(f)["keys"]
+            matrix = np.load(matrix_path, mmap_mode="r")
+        except (FileNotFoundError, ValueError, KeyError):
+            return None, {}
+        if matrix.shape[0] != len(keys):
+            # the two files were written by different runs; start over
+            return None, {}
+        return matrix, {key: row for row, key in enumerate(keys)}
+
+    def save(self, doc_hash, matrix, keys):
+        matrix_path, meta_path = self._paths(doc_hash)
+        os.makedirs(os.path.dirname(matrix_path), exist_ok=True)
+        # a unique temp file per writer: the server and a bulk run may save the same document at once
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(matrix_path), suffix=".npy.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(matrix, dtype=self.dtype))
+            os.replace(tmp_path, matrix_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        atomic_write_bytes(meta_path, json.dumps({"keys": keys}).encode("utf-8"))
+
+    def delete(self, doc_hash):
+        for path in self._paths(doc_hash):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get_or_embed(self, doc_hash, texts, embed_fn):
+        """
+        Embeddings for texts (one row each, float32), embedding only the texts
+        this document has not stored yet. embed_fn maps a list of texts to a matrix.
+        """
+        keys = [text_key(t) for t in texts]
+        matrix, index = self.load(doc_hash)
+
+        missing = {}
+        for i, key in enumerate(keys):
+            if key not in index and key not in missing:
+                missing[key] = i
+
+        if missing:
+            new_rows = np.asarray(embed_fn([texts[i] for i in missing.values()]))
+            stored_keys = list(index)
+            if matrix is None:
+                combined = new_rows
+            else:
+                combined = np.concatenate([np.asarray(matrix, dtype=new_rows.dtype), new_rows])
+            stored_keys.extend(missing)
+            self.save(doc_hash, combined, stored_keys)
+            matrix, index = combined.astype(self.dtype, copy=False), {key: row for row, key in enumerate(stored_keys)}
+
+        rows = [index[key] for key in keys]
+        if self.dtype == np.float32 and rows == list(range(matrix.shape[0])):
+            return matrix  # stored in query order already: hand back the mapping itself
+        return np.asarray(matrix[rows], dtype=np.float32)
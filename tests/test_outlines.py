@@ -0,0 +1,92 @@
+"""Outlines of the sample PDFs; 5.pdf and 6.pdf put their subheadings right above bulleted lists."""
+import os
+
+import fitz
+import pytest
+
+from src.extract import extract_outline
+from src.streaming import extract_outline_streaming
+
+PDF_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "input", "tc1", "pdfs")
+SAMPLES = sorted(f for f in os.listdir(PDF_DIR) if f.endswith(".pdf"))
+
+EXPECTED = {
+    "5.pdf": [
+        ("H2", "Beach Hopping ", 1),
+        ("H2", "Water Sports ", 1),
+        ("H2", "Art and Museums ", 2),
+        ("H2", "Historical Sites ", 2),
+        ("H2", "Hiking and Biking ", 3),
+        ("H2", "Water Activities ", 3),
+        ("H2", "Wine Tasting ", 4),
+        ("H2", "Cooking Classes ", 4),
+        ("H2", "Spa and Wellness Retreats ", 6),
+        ("H2", "Yoga and Meditation Retreats ", 6),
+        ("H2", "Local Markets ", 7),
+        ("H2", "Boutique Shopping ", 7),
+        ("H2", "Theme Parks and Attractions ", 8),
+        ("H2", "Outdoor Adventures ", 8),
+        ("H2", "Educational Experiences ", 8),
+        ("H2", "Bars and Lounges ", 10),
+        ("H2", "Nightclubs ", 10),
+    ],
+    "6.pdf": [
+        ("H2", "Introduction ", 0),
+        ("H2", "Summer (June to August) ", 2),
+        ("H2", "Autumn (September to November) ", 2),
+        ("H2", "Winter (December to February) ", 2),
+        ("H2", "Packing for Adults Clothing ", 3),
+        ("H2", "Toiletries ", 3),
+        ("H2", "Gadgets and Accessories ", 3),
+        ("H2", "Essentials ", 5),
+        ("H2", "Toiletries ", 5),
+        ("H2", "Safety and Comfort ", 5),
+        ("H2", "Beach Trips ", 6),
+        ("H2", "Hiking and Outdoor Activities ", 6),
+        ("H2", "City Exploration ", 6),
+        ("H2", "Wine Tours ", 6),
+        ("H2", " Tips and Tricks for Packing ", 7),
+    ],
+}
+
+
+@pytest.mark.parametrize("filename", sorted(EXPECTED))
+def test_outline_keeps_headings_above_bulleted_lists(filename):
+    outline = extract_outline(os.path.join(PDF_DIR, filename))["outline"]
+    assert [(h["level"], h["text"], h["page"]) for h in outline] == EXPECTED[filename]
+
+
+@pytest.mark.parametrize("filename", SAMPLES)
+def test_streaming_matches_extract_outline(filename):
+    path = os.path.join(PDF_DIR, filename)
+    assert extract_outline_streaming(path) == extract_outline(path)
+
+
+def test_streaming_matches_across_a_page_break(tmp_path):
+    # the paragraph opening page 2 makes the bold line ending page 1 a heading; build_outline
+    # finds that one before the bold line above the paragraph on page 1, and so skips the
+    # repeated "Boutique Shopping" there and takes "Local Markets" instead
+    paragraph = "the quick brown fox jumps over the lazy dog while the band plays on through the night"
+    lines = [
+        (0, 60, 20, "helv", "Travel Notes"),
+        (0, 120, 11, "hebo", "Local Markets"),
+        (0, 170, 11, "hebo", "Boutique Shopping"),
+        (0, 220, 11, "helv", paragraph),
+        (0, 700, 11, "hebo", "Boutique Shopping"),
+        (1, 60, 11, "helv", paragraph),
+        (1, 120, 11, "helv", paragraph),
+        (1, 180, 11, "helv", paragraph),
+    ]
+    doc = fitz.open()
+    for _ in range(2):
+        doc.new_page(width=1000, height=842)
+    for page, y, size, font, text in lines:
+        doc[page].insert_text((72, y), text, fontsize=size, fontname=font)
+    path = str(tmp_path / "page_break.pdf")
+    doc.save(path)
+    doc.close()
+
+    outline = extract_outline(path)
+    headings = [(h["level"], h["text"]) for h in outline["outline"]]
+    assert headings == [("H2", "Local Markets"), ("H1", "Boutique Shopping")]
+    assert extract_outline_streaming(path) == outline